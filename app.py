@@ -1,10 +1,79 @@
+import glob
+import hashlib
+import os
+import shutil
+import threading
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import streamlit.components.v1 as components
 from streamlit_js_eval import streamlit_js_eval
 import plotly.graph_objects as go
 import plotly.express as px
+from scoring import (SCORE_BATCH_SIZE, VECTOR_DIM, apply_correction, available_cpus, categorize_batch, embed_texts,
+                     index_stamp, load_or_build_index, select_top_k, taxonomy_version)
+from neighbors import CatalogLoader
+from score_cache import ScoreCache, cache_key
+from taxonomy import PATH_SEPARATOR, TaxonomyTree, categorize_hierarchical
+from run_scores import RunScores
+from dedup import categorize_deduplicated
+from scoring_service import LocalModelBackend, ScoringService
+from quantization import QuantizedCategoryIndex, quantization_report
+from jobs import ACTIVE_STATUSES, DONE, JobQueue
+from ingest import (COMPRESSED_FORMATS, UPLOAD_FORMATS, count_rows, iter_chunks, read_header, read_preview,
+                    merge_chunk_streams, skip_leading_rows, upload_format)
+from validation import FLAGGED, REJECTED, UploadValidator
+from run_repository import RunRepository
+
+# Persistent app state (category index files, caches, databases) lives here
+DATA_DIR = os.environ.get("SKILL_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+INDEX_DIR = os.path.join(DATA_DIR, "index")
+
+# Optional catalog of known skills (skill_name[, skill_description]) for related-skill lookup
+SKILL_CATALOG_PATH = os.path.join(DATA_DIR, "skill_catalog.csv")
+RELATED_SKILLS_COUNT = 3
+# Catalog skills kept per category as candidates for that re-ranking
+RELATED_SKILLS_CANDIDATES = 20
+
+# Alternatives listed in the validation dialog besides the current category
+ALTERNATIVE_CATEGORY_COUNT = 4
+
+# Taxonomies with more nodes than this are scored top-down with beam search
+HIERARCHICAL_MIN_CATEGORIES = 200
+
+SCORE_CACHE_PATH = os.path.join(DATA_DIR, "score_cache.sqlite")
+
+# Stored categorization runs, and how many Recent History shows per page
+RUNS_PATH = os.path.join(DATA_DIR, "runs.sqlite")
+HISTORY_PAGE_SIZE = 50
+# Latest runs offered in Recent History's run filter
+RUN_FILTER_OPTIONS = 1000
+
+# Background upload jobs: their table and the uploads they read from
+JOBS_PATH = os.path.join(DATA_DIR, "jobs.sqlite")
+UPLOAD_DIR = os.path.join(DATA_DIR, "uploads")
+
+# Rows each upload job rejected or flagged during validation, one CSV per job
+REJECTS_DIR = os.path.join(DATA_DIR, "rejects")
+
+# Files of one upload parsed at the same time
+UPLOAD_PARSE_WORKERS = available_cpus()
+
+# Results of processed uploads, by file fingerprint and by row description, per taxonomy revision
+UPLOAD_CACHE_PATH = os.path.join(DATA_DIR, "upload_cache.sqlite")
+# Rows the upload cache keeps, oldest writes dropped first; sized so one large upload stays whole
+UPLOAD_CACHE_MAX_ROWS = 1000000
+
+# Working-memory ceiling for one upload chunk while it is parsed, scored and stored
+INGEST_MEMORY_LIMIT_MB = int(os.environ.get("SKILL_INGEST_MEMORY_MB", "256"))
+
+# Score against int8 vectors (float re-rank of the top candidates); see the sidebar accuracy report
+USE_INT8_VECTORS = os.environ.get("SKILL_INT8_VECTORS", "0") == "1"
+QUANTIZATION_SAMPLE_SIZE = 2000
+
+# Skill vectors and category scores of stored runs, one directory per vector format
+RUN_SCORES_DIR = os.path.join(DATA_DIR, "run_scores-int8" if USE_INT8_VECTORS else "run_scores")
 
 # Set page config must be the first Streamlit command
 st.set_page_config(
@@ -154,6 +223,13 @@ st.markdown("""
         line-height: 1.5;
     }
     
+    .category-path {
+        color: #a0aec0;
+        font-size: 0.85rem;
+        letter-spacing: 0.02em;
+        margin-bottom: 0.4rem;
+    }
+    
     .source-history {
         font-family: 'SF Mono', monospace;
         font-size: 0.9rem;
@@ -491,38 +567,78 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Placeholder function to infer best skill categorizations
+# Infer the best category and reasoning for a single skill; concurrent calls from
+# all sessions are micro-batched by the scoring service
 def infer_skill_categorization(skill_description):
-    return "Recommended Category", "This category was recommended based on ..."
+    result = get_scoring_service().categorize(skill_description, get_scoring_backend())
+    return result["recommended_category"], result["reasoning"]
+
+def infer_skill_categorization_batch(skill_descriptions, backend=None, service=None):
+    """Categorize a Series of skill descriptions; returns recommended_category, match_score, reasoning, category_path, alternatives and duplicate_of columns"""
+    # Background jobs pass the backend and service in; they run outside any Streamlit script thread
+    backend = get_scoring_backend() if backend is None else backend
+    service = get_scoring_service() if service is None else service
+    # Near-duplicate descriptions are scored once, through one representative per group,
+    # and sent to the service as a single request
+    return categorize_deduplicated(
+        skill_descriptions,
+        lambda unique: pd.DataFrame(service.categorize_many(unique.tolist(), backend), index=unique.index)
+    )
+
+def categorize_skill_descriptions(skill_descriptions, top_k=3, index=None, tree=None):
+    # The scoring backend passes the index and tree in; it runs on the service's worker threads
+    index = get_scoring_index() if index is None else index
+    tree = get_taxonomy_tree() if tree is None else tree
+    # Large taxonomies descend the tree with a beam instead of scoring every leaf
+    if len(tree.names) > HIERARCHICAL_MIN_CATEGORIES:
+        return categorize_hierarchical(tree, skill_descriptions, beam_width=top_k + 1)
+    results = categorize_batch(index, skill_descriptions, top_k=top_k)
+    results["category_path"] = (results["recommended_category"]
+                                .map(dict(zip(tree.names, tree.paths)))
+                                .fillna(results["recommended_category"]))
+    return results
 
 # Add this after the infer_skill_categorization function
 def get_category_match_scores(skill_description):
     """Return match scores and related skills for each category for a given skill"""
-    # In a real implementation, this would use an AI model or algorithm
-    # Currently returning mock data
+    # Keyed on the scorer and catalog versions so an edit to either, or a switch to int8, invalidates old entries
+    catalog = get_skill_catalog()
+    # Built-in related skills stand in while the catalog builds; they are cached under their own key
+    version = f"{scorer_version(get_scoring_index())}:{catalog.version if catalog is not None else 'building'}"
+    return get_score_cache().get_or_compute(skill_description, version, compute_category_match_scores)
+
+def compute_category_match_scores(skill_description):
+    scores = get_category_match_scores_batch([skill_description])[0]
+    related_skills = get_related_skills(skill_description)
     return {
-        "Software Development": {
-            "score": 0.9238654,
-            "related_skills": ["Java Programming", "Software Architecture"]
-        },
-        "Big Data": {
-            "score": 0.9114384,
-            "related_skills": ["Hadoop", "Spark"]
-        },
-        "Data and Analytics": {
-            "score": 0.9057195,
-            "related_skills": ["SQL", "Data Visualization"]
-        },
-        "Data Modeling": {
-            "score": 0.8941223,
-            "related_skills": ["Database Design", "ERD"]
-        },
-        "SAP Basis": {
-            "score": 0.7046884,
-            "related_skills": ["SAP Administration", "SAP Security"]
+        category: {
+            "score": float(score),
+            "related_skills": related_skills.get(category) or CATEGORY_RELATED_SKILLS.get(category, [])
         }
+        for category, score in zip(get_category_index().categories, scores)
     }
 
+def get_related_skills(skill_description):
+    """Catalog skills near each category, re-ranked by similarity to the skill being reviewed"""
+    catalog = get_skill_catalog()
+    if catalog is None:
+        return {}
+    index = get_category_index()
+    candidates = get_related_skill_candidates(index.version, index.revision, catalog.version)
+    # Only skills near the category itself are candidates; the skill just orders them
+    skill_vector = embed_texts([skill_description], index.dim)[0]
+    return {category: catalog.rerank(ids, skill_vector, k=RELATED_SKILLS_COUNT)
+            for category, ids in zip(index.categories, candidates)}
+
+# Searched with the category vectors alone, once per taxonomy revision and catalog
+@st.cache_resource(max_entries=2)
+def get_related_skill_candidates(version, revision, catalog_version):
+    return get_skill_catalog().candidates(get_category_index().vectors, RELATED_SKILLS_CANDIDATES)
+
+def get_category_match_scores_batch(skill_descriptions):
+    """Return an (n_skills, n_categories) score array, columns in CATEGORY_DESCRIPTIONS order"""
+    return get_scoring_service().score_many(skill_descriptions, get_scoring_backend())
+
 # Add category descriptions
 CATEGORY_DESCRIPTIONS = {
     "Software Development": """
@@ -556,8 +672,178 @@ CATEGORY_DESCRIPTIONS = {
     """
 }
 
-# Mock data for recent runs
-recent_runs = [
+# Parent groups of the taxonomy; children are categories above or other parent groups
+CATEGORY_TREE = {
+    "Software Engineering": ["Software Development"],
+    "Data": ["Big Data", "Data and Analytics", "Data Modeling"],
+    "Enterprise Systems": ["SAP Basis"]
+}
+
+TAXONOMY_VERSION = taxonomy_version(CATEGORY_DESCRIPTIONS)
+
+# Related skills shown alongside each category in the validation dialog
+CATEGORY_RELATED_SKILLS = {
+    "Software Development": ["Java Programming", "Software Architecture"],
+    "Big Data": ["Hadoop", "Spark"],
+    "Data and Analytics": ["SQL", "Data Visualization"],
+    "Data Modeling": ["Database Design", "ERD"],
+    "SAP Basis": ["SAP Administration", "SAP Security"]
+}
+
+def get_taxonomy_tree():
+    index = get_category_index()
+    return load_taxonomy_tree(index.version, index.revision, repr(CATEGORY_TREE))
+
+@st.cache_resource(max_entries=4)
+def load_taxonomy_tree(version, revision, tree_key):
+    return TaxonomyTree.build(CATEGORY_TREE, get_category_index())
+
+# Match scores shown in the validation dialog are memoized across reruns and restarts
+@st.cache_resource
+def get_score_cache():
+    return ScoreCache(SCORE_CACHE_PATH)
+
+# Re-uploads are answered from here instead of being scored again
+@st.cache_resource
+def get_upload_cache():
+    return ScoreCache(UPLOAD_CACHE_PATH, max_rows=UPLOAD_CACHE_MAX_ROWS)
+
+def get_skill_catalog():
+    """The skill catalog, or None while its index is first built in the background"""
+    return get_skill_catalog_loader().catalog
+
+# Known skills come from the catalog CSV when present, else the built-in related skills.
+# A new catalog's index is built off the script thread and saved for later restarts
+@st.cache_resource
+def get_skill_catalog_loader():
+    if os.path.exists(SKILL_CATALOG_PATH):
+        catalog_df = pd.read_csv(SKILL_CATALOG_PATH)
+        name_col = find_column(catalog_df, SKILL_NAME_COLUMNS)
+        desc_col = find_column(catalog_df, SKILL_DESCRIPTION_COLUMNS)
+        if name_col is None:
+            # Related skills then fall back to CATEGORY_RELATED_SKILLS; the dialog warns about it
+            return CatalogLoader([], INDEX_DIR)
+        descriptions = catalog_df[desc_col].tolist() if desc_col is not None else None
+        return CatalogLoader(catalog_df[name_col].tolist(), INDEX_DIR, descriptions)
+    names = [skill for skills in CATEGORY_RELATED_SKILLS.values() for skill in skills]
+    return CatalogLoader(names, INDEX_DIR)
+
+# Category vectors are built once into a versioned index file and memory-mapped
+# by every worker, so replicas on one host share a single copy in the page cache.
+# Cached per taxonomy version so an edit to CATEGORY_DESCRIPTIONS takes effect on rerun,
+# and per file stamp so reviewer corrections saved by any session are picked up.
+def get_category_index():
+    return load_category_index(TAXONOMY_VERSION, index_stamp(INDEX_DIR, TAXONOMY_VERSION))
+
+@st.cache_resource(max_entries=4)
+def load_category_index(version, stamp):
+    return load_or_build_index(CATEGORY_DESCRIPTIONS, INDEX_DIR)
+
+def get_scoring_index():
+    """Index used for scoring: the float index, or its int8 counterpart when USE_INT8_VECTORS is set"""
+    index = get_category_index()
+    return load_scoring_index(index.version, index.revision, USE_INT8_VECTORS)
+
+@st.cache_resource(max_entries=2)
+def load_scoring_index(version, revision, quantized):
+    index = get_category_index()
+    return QuantizedCategoryIndex(index) if quantized else index
+
+def get_quantization_report():
+    index = get_category_index()
+    return load_quantization_report(index.version, index.revision, len(get_run_repository()))
+
+# Accuracy of the int8 path against the float path, measured on the latest stored runs
+@st.cache_resource(max_entries=1)
+def load_quantization_report(version, revision, n_runs):
+    sample = get_run_repository().latest_descriptions(QUANTIZATION_SAMPLE_SIZE)
+    return quantization_report(get_category_index(), sample)
+
+# One service for the life of the process; each request names the backend of the
+# taxonomy revision it was made under, so there is no service to replace on an edit
+@st.cache_resource
+def get_scoring_service():
+    return ScoringService()
+
+def get_scoring_backend():
+    index = get_category_index()
+    return load_scoring_backend(index.version, index.revision, USE_INT8_VECTORS, repr(CATEGORY_TREE))
+
+# Swap LocalModelBackend for a real model backend here
+@st.cache_resource(max_entries=2)
+def load_scoring_backend(version, revision, quantized, tree_key):
+    index, tree = get_scoring_index(), get_taxonomy_tree()
+    return LocalModelBackend(lambda descriptions: categorize_skill_descriptions(descriptions, index=index, tree=tree),
+                             index.score_batch)
+
+# Process Skills work runs here, off the script thread, and outlives the session that started it
+@st.cache_resource
+def get_job_queue():
+    # Jobs interrupted by a restart resume from their last checkpoint when the queue opens
+    return JobQueue(JOBS_PATH, {"upload": make_upload_job}, cleanups={"upload": cleanup_upload_job})
+
+# Scores of stored runs, kept current column by column as the taxonomy changes
+@st.cache_resource
+def get_run_scores():
+    return RunScores(VECTOR_DIM, RUN_SCORES_DIR, quantized=USE_INT8_VECTORS)
+
+def sync_run_recommendations():
+    """Score runs added since the last rerun and re-recommend unreviewed runs whose best category may have moved"""
+    store, repository = get_run_scores(), get_run_repository()
+    index = get_category_index()
+    with store.lock:
+        # Scores saved for a run repository that has since been recreated no longer line up
+        if len(store) > len(repository):
+            store.reset()
+        rows, best_columns = store.sync(index)
+        # Reviewer decisions stand; the repository only refreshes the algorithm's own pick
+        repository.update_recommendations(
+            (row + 1, index.categories[column],
+             f"Re-scored after a taxonomy change: strongest overlap with the "
+             f"{index.categories[column]} category description (score {store.scores[row, column]:.2f}).")
+            for row, column in zip(rows, best_columns)
+        )
+    # Upload jobs score their own runs as they store them; any others, or a whole store
+    # emptied by switching vector format, are caught up off the script thread
+    catch_up_run_scores(store, repository)
+
+# Held by the thread catching up the run scores, so only one runs at a time
+@st.cache_resource
+def get_run_scores_catch_up_lock():
+    return threading.Lock()
+
+def catch_up_run_scores(store, repository):
+    """Score runs the store has not seen yet on a background thread, unless one is already at it"""
+    busy = get_run_scores_catch_up_lock()
+    if len(store) >= len(repository) or not busy.acquire(blocking=False):
+        return
+
+    def catch_up():
+        try:
+            score_new_runs(store, repository)
+        finally:
+            busy.release()
+
+    threading.Thread(target=catch_up, name="run-scores-catch-up", daemon=True).start()
+
+def score_new_runs(store, repository):
+    """Embed and score runs stored since the run scores last caught up.
+
+    The lock is taken per batch, so a job scoring a large chunk never holds up a
+    script thread's sync for longer than one batch.
+    """
+    while True:
+        with store.lock:
+            # Store rows follow run seq order and persist across restarts, so only runs past
+            # the last stored seq are new
+            first_row = len(store)
+            new_runs = repository.descriptions_after(first_row, limit=SCORE_BATCH_SIZE)
+            if not new_runs:
+                return
+            store.add_runs([description for _, description in new_runs], first_row=first_row)
+
+# Mock data for recent runs, stored when the run repository is first created
+SAMPLE_RUNS = [
     {
         "run_id": "Run 1 - Dec 18, 2024 - 2:30pm IST",
         "timestamp": "2024-12-18 14:30:00",
@@ -625,12 +911,266 @@ recent_runs = [
     }
 ]
 
-# Cache recent runs
-@st.cache_data
-def get_recent_runs():
-    return recent_runs
+# Runs are stored in SQLite so processed uploads survive reruns and restarts
+@st.cache_resource
+def get_run_repository():
+    repository = RunRepository(RUNS_PATH)
+    if not len(repository):
+        repository.append(SAMPLE_RUNS)
+    return repository
+
+sync_run_recommendations()
+
+# Column names recognised in uploaded files, in order of preference
+SKILL_NAME_COLUMNS = ["input_skill", "skill_name", "skill", "name", "title"]
+SKILL_DESCRIPTION_COLUMNS = ["skill_description", "description", "work_experience", "experience"]
+
+def record_category_change(run, new_category, reviewer, changed_at):
+    """Apply a reviewer's correction to a run and nudge the category vectors towards it"""
+    get_run_repository().record_review(
+        run["run_id"], {"timestamp": changed_at, "source": reviewer, "category": new_category, "action": "Changed"},
+        f"{run['categorization_source']} → Changed by {reviewer}"
+    )
+    # Saved atomically; every session reloads the index on its next rerun via index_stamp
+    apply_correction(INDEX_DIR, TAXONOMY_VERSION, new_category, run["skill_description"])
+
+def find_column(df, candidates):
+    """Return the first column of df matching one of the candidate names (case-insensitive)"""
+    columns = {str(col).strip().lower().replace(" ", "_"): col for col in df.columns}
+    return next((columns[name] for name in candidates if name in columns), None)
+
+def read_upload_columns(uploaded_file):
+    """Column names of an uploaded file, read from its header only"""
+    return read_header(uploaded_file, upload_format(uploaded_file.name))
+
+def iter_upload_chunks(path, columns, skip_rows=0):
+    """Yield a saved upload as DataFrame chunks, parsing only the given columns and starting after skip_rows rows"""
+    chunks = iter_chunks(path, upload_format(path), columns, INGEST_MEMORY_LIMIT_MB)
+    yield from skip_leading_rows(chunks, skip_rows)
+
+def read_upload_preview(uploaded_file):
+    """First rows of an uploaded file, parsed without reading the rest"""
+    return read_preview(uploaded_file, upload_format(uploaded_file.name))
+
+# Counted once per upload: line breaks for CSV, stored metadata for Excel, Parquet and Arrow,
+# and an estimate from the recorded inflated size for gzip and zip
+@st.cache_data(max_entries=8)
+def get_upload_row_count(file_id, _uploaded_file):
+    return count_rows(_uploaded_file, upload_format(_uploaded_file.name))
+
+def save_upload(uploaded_file):
+    """Copy an upload to UPLOAD_DIR so a background job can read it after the session moves on"""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_DIR, f"{datetime.now():%Y%m%d%H%M%S%f}-{os.path.basename(uploaded_file.name)}")
+    uploaded_file.seek(0)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(uploaded_file, out)
+    uploaded_file.seek(0)
+    return path
+
+def hash_upload(uploaded_file):
+    """SHA-256 of an upload's content"""
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for block in iter(lambda: uploaded_file.read(1 << 20), b""):
+        digest.update(block)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+def rejects_report_path(job_id, chunk=None):
+    """Where a job's rejects report is written; with chunk, the part holding that chunk's rows"""
+    return os.path.join(REJECTS_DIR, f"{job_id}.csv" if chunk is None else f"{job_id}-{chunk:06d}.csv")
+
+def combine_rejects_report(job_id, chunks):
+    """Join a job's per-chunk rejects parts into its report; returns whether the report has any rows"""
+    parts = [rejects_report_path(job_id, chunk) for chunk in range(chunks)]
+    parts = [part for part in parts if os.path.exists(part)]
+    if not parts:
+        return False
+    with open(rejects_report_path(job_id), "wb") as out:
+        for number, part in enumerate(parts):
+            with open(part, "rb") as handle:
+                if number:
+                    handle.readline()  # header, already written from the first part
+                shutil.copyfileobj(handle, out)
+    for part in parts:
+        os.remove(part)
+    return True
+
+def scorer_version(index):
+    """Identity of the scorer an upload result came from: taxonomy version, correction revision and vector format"""
+    return f"{index.version}.{index.revision}.{'int8' if isinstance(index, QuantizedCategoryIndex) else 'float32'}"
+
+def start_upload_job(uploads):
+    """Queue (uploaded file, name column, description column) triples as one categorization job.
+
+    Files whose content was already processed by the current scorer are left out. Returns (job id, or None if no file needed processing, {file name: earlier job id}).
+    """
+    index, upload_cache, repository = get_scoring_index(), get_upload_cache(), get_run_repository()
+    files, reused, total_rows = [], {}, 0
+    for uploaded_file, name_column, description_column in uploads:
+        # The content hash is already a digest; only the scorer is appended
+        file_key = f"file:{hash_upload(uploaded_file)}:{scorer_version(index)}"
+        previous = upload_cache.get(file_key)
+        # The same content under the same scorer: the earlier job's runs stand
+        if previous is not None and repository.has_job(previous["job_id"]):
+            reused[uploaded_file.name] = previous["job_id"]
+            continue
+        files.append({"path": save_upload(uploaded_file), "name": uploaded_file.name, "name_column": name_column,
+                      "description_column": description_column, "file_key": file_key})
+        rows = get_upload_row_count(uploaded_file.file_id, uploaded_file)
+        total_rows = None if total_rows is None or rows is None else total_rows + rows
+    if not files:
+        return None, reused
+    job_name = files[0]["name"] if len(files) == 1 else f"{len(files)} files"
+    return get_job_queue().submit(job_name, "upload", {"files": files}, total_rows), reused
+
+def categorize_upload_rows(skill_descriptions, index, backend, service, upload_cache):
+    """Categorize upload rows, scoring only descriptions not already cached for this scorer.
+
+    Returns (results with recommended_category and reasoning, rows reused from the
+    cache, rows scored after near-duplicate grouping).
+    """
+    version = scorer_version(index)
+    keys = [cache_key(description, version) for description in skill_descriptions]
+    cached = upload_cache.get_many(list(set(keys)))
+    missing = np.array([key not in cached for key in keys], dtype=bool)
+    scored = 0
+    if missing.any():
+        fresh = infer_skill_categorization_batch(skill_descriptions[missing], backend, service)
+        scored = fresh["duplicate_of"].nunique()
+        new_results = {
+            key: {"recommended_category": category, "reasoning": reasoning}
+            for key, category, reasoning in zip(np.asarray(keys)[missing], fresh["recommended_category"], fresh["reasoning"])
+        }
+        upload_cache.put_many(new_results.items())
+        cached.update(new_results)
+    results = pd.DataFrame([cached[key] for key in keys], index=skill_descriptions.index,
+                           columns=["recommended_category", "reasoning"])
+    return results, int((~missing).sum()), scored
+
+def make_upload_job(params):
+    """Work for the job queue: categorize saved uploads chunk by chunk into the run repository"""
+    # Captured here, in the script thread; the job thread cannot reach Streamlit's caches
+    index, upload_cache = get_scoring_index(), get_upload_cache()
+    backend, service = get_scoring_backend(), get_scoring_service()
+    repository, run_scores = get_run_repository(), get_run_scores()
+    files = params["files"]
 
-temp_recent_runs = get_recent_runs()
+    def work(job):
+        started = datetime.fromtimestamp(job.created_at)
+        totals = {"categorized": 0, "reused": 0, "scored": 0, REJECTED: 0, FLAGGED: 0}
+        # Duplicates are checked across every file of the job
+        validator = UploadValidator()
+
+        def summary():
+            return (f"{totals['categorized']:,} categorized · {totals['reused']:,} reused from earlier uploads · "
+                    f"{totals['scored']:,} scored after near-duplicate grouping · "
+                    f"{totals[REJECTED]:,} rejected and {totals[FLAGGED]:,} flagged by validation")
+
+        # After a restart, committed chunks whose runs were not stored yet go into the run
+        # repository, all of them go into the validator, and each file picks up after the
+        # rows its committed chunks covered
+        file_rows = [0] * len(files)
+        for number, payload in enumerate(job.committed_chunks()):
+            if not repository.has_job(job.job_id, number):
+                append_runs(repository, payload["runs"], started, number)
+                score_new_runs(run_scores, repository)
+            position = payload["file"]
+            # Blank names were stored as a description prefix; the validator saw the names it cleaned
+            validator.remember(payload["names"], [run["skill_description"] for run in payload["runs"]])
+            for key in totals:
+                totals[key] += payload[key]
+            file_rows[position] = payload["file_rows"]
+
+        streams = [
+            iter_upload_chunks(file["path"], [column for column in (file["name_column"], file["description_column"])
+                                              if column is not None], file_rows[position])
+            for position, file in enumerate(files)
+        ]
+        # Files are parsed concurrently; chunks are scored here in the order they arrive
+        chunks = merge_chunk_streams(streams, max_workers=min(len(files), UPLOAD_PARSE_WORKERS))
+        for number, (position, chunk) in enumerate(chunks, start=job.chunks_done):
+            file = files[position]
+            first_row = file_rows[position] + 1
+            file_rows[position] += len(chunk)
+            chunk, report = validator.validate(chunk, file["name_column"], file["description_column"], first_row)
+            payload = {"runs": [], "names": None, "file": position, "file_rows": file_rows[position], "categorized": len(chunk),
+                       "reused": 0, "scored": 0, REJECTED: int((report["action"] == REJECTED).sum()),
+                       FLAGGED: int((report["action"] == FLAGGED).sum())}
+            if len(report):
+                os.makedirs(REJECTS_DIR, exist_ok=True)
+                report.insert(0, "source_file", file["name"])
+                report.to_csv(rejects_report_path(job.job_id, number), index=False)
+            if len(chunk):
+                results, payload["reused"], payload["scored"] = categorize_upload_rows(
+                    chunk[file["description_column"]], index, backend, service, upload_cache)
+                payload["runs"] = build_runs(chunk, results, started, job.job_id, file["name"])
+                if file["name_column"] is not None:
+                    payload["names"] = chunk[file["name_column"]].tolist()
+            for key in totals:
+                totals[key] += payload[key]
+            # Checkpoint first: a chunk is stored once, and replayed from disk if we stop before appending it
+            if job.commit_chunk(number, sum(file_rows), payload, summary()):
+                append_runs(repository, payload["runs"], started, number)
+                # Scored here rather than on the next rerun, which would embed the whole job in the script thread
+                score_new_runs(run_scores, repository)
+
+        for file in files:
+            upload_cache.put(file["file_key"], {"job_id": job.job_id})
+        if combine_rejects_report(job.job_id, job.chunks_done):
+            return summary() + " · rejects report ready"
+        return summary()
+
+    return work
+
+def cleanup_upload_job(job_id, params):
+    """Remove a finished or failed upload job's spooled uploads and any rejects report parts it left"""
+    parts = glob.glob(os.path.join(REJECTS_DIR, f"{glob.escape(job_id)}-*.csv"))
+    for path in [file["path"] for file in params["files"]] + parts:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def format_elapsed(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+def format_run_id(run_number, when):
+    return f"Run {run_number} - {when.strftime('%b %d, %Y')} - {when.strftime('%I:%M%p').lstrip('0').lower()}"
+
+def append_runs(repository, new_runs, when, job_chunk=None):
+    """Number new runs after the stored ones and store them"""
+    repository.append(new_runs, lambda number: format_run_id(number, when), job_chunk)
+
+def build_runs(df, results, when, job_id=None, source_file=None):
+    """Turn categorized upload rows into run records for the run repository, numbered by append_runs"""
+    name_col = find_column(df, SKILL_NAME_COLUMNS)
+    desc_col = find_column(df, SKILL_DESCRIPTION_COLUMNS)
+    names = df[desc_col].str.slice(0, 60)
+    if name_col is not None:
+        names = df[name_col].where(df[name_col].astype(str).str.strip().ne(""), names)
+    timestamp = when.strftime("%Y-%m-%d %H:%M:%S")
+    return [
+        {
+            "run_id": None,
+            "timestamp": timestamp,
+            "input_skill": str(name),
+            "skill_description": str(description),
+            "recommended_category": category,
+            "reasoning": reasoning,
+            "categorization_source": "Algorithm (Initial)",
+            "job_id": job_id,
+            "source_file": source_file,
+            "history": [
+                {"timestamp": timestamp, "source": "Algorithm", "category": category}
+            ]
+        }
+        for name, description, category, reasoning in zip(
+            names, df[desc_col], results["recommended_category"], results["reasoning"]
+        )
+    ]
 
 # Sidebar with help
 with st.sidebar:
@@ -638,7 +1178,7 @@ with st.sidebar:
     st.markdown("""
     1. **Upload Data**
        - Use the Upload tab
-       - Support for CSV and Excel
+       - Support for CSV (also gzipped or zipped), Excel, Parquet and Arrow
     
     2. **Review Results**
        - Switch to Recent Runs
@@ -662,6 +1202,50 @@ with st.sidebar:
         label_visibility="collapsed"
     )
 
+    cache_stats = get_score_cache().stats()
+    st.caption(
+        f"Score cache: {cache_stats['memory_hits']} memory hits · {cache_stats['disk_hits']} disk hits · "
+        f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)"
+    )
+    service_stats = get_scoring_service().stats()
+    st.caption(
+        f"Scoring service: {service_stats['requests']} requests in {service_stats['batches']} batches · "
+        f"p50 {service_stats['p50_ms']:.1f} ms · p95 {service_stats['p95_ms']:.1f} ms · "
+        f"mean batch {service_stats['mean_batch_size']:.1f}"
+    )
+    jobs = get_job_queue().recent(limit=5)
+    if jobs:
+        st.divider()
+        st.markdown("### ⏳ Processing Jobs")
+    for job in jobs:
+        st.progress(job["progress"], text=f"{job['name']} · job {job['job_id']}")
+        status = [job["status"].capitalize(), f"{job['rows_done']:,}"
+                  + (f" of {job['total_rows']:,}" if job["total_rows"] is not None else "") + " rows"]
+        if job["rows_per_second"]:
+            status.append(f"{job['rows_per_second']:,.0f} rows/s")
+        if job["eta_seconds"] is not None:
+            status.append(f"ETA {format_elapsed(job['eta_seconds'])}")
+        st.caption(" · ".join(status))
+        if job["error"]:
+            st.caption(f"Error: {job['error']}")
+        elif job["detail"]:
+            st.caption(job["detail"])
+        if job["status"] == DONE and os.path.exists(rejects_report_path(job["job_id"])):
+            with open(rejects_report_path(job["job_id"]), "rb") as report:
+                st.download_button("⬇ Rejects report", report.read(), file_name=f"rejects-{job['job_id']}.csv",
+                                   mime="text/csv", key=f"rejects-{job['job_id']}", use_container_width=True)
+    if any(job["status"] in ACTIVE_STATUSES for job in jobs):
+        st.button("↻ Refresh progress", use_container_width=True)
+
+    int8_report = get_quantization_report()
+    if int8_report["samples"]:
+        st.caption(
+            f"Int8 vectors ({'on' if USE_INT8_VECTORS else 'off'}): "
+            f"{int8_report['top1_agreement']:.0%} top-1 agreement with float32 over {int8_report['samples']} runs · "
+            f"mean score error {int8_report['mean_abs_error']:.4f} · "
+            f"{int8_report['skill_vector_bytes_int8']} vs {int8_report['skill_vector_bytes_float32']} bytes per vector"
+        )
+
 # Replace the tab1/tab2 logic with page-based logic:
 if page == "Dashboard":
     # Move all dashboard content here (metrics, charts, etc.)
@@ -670,10 +1254,10 @@ if page == "Dashboard":
     
     # All the metrics calculations and visualizations go here
     # (Move the existing dashboard code here)
-    total_skills = len(recent_runs)
-    validated_skills = len([run for run in recent_runs if len(run['history']) > 1])
+    run_repository = get_run_repository()
+    total_skills = len(run_repository)
+    validated_skills, changed_categories = run_repository.review_counts()
     pending_validation = total_skills - validated_skills
-    changed_categories = len([run for run in recent_runs if any(h.get('action') == 'Changed' for h in run['history'])])
     validation_rate = (validated_skills / total_skills * 100) if total_skills > 0 else 0
     accuracy_rate = ((validated_skills - changed_categories) / validated_skills * 100) if validated_skills > 0 else 0
 
@@ -758,27 +1342,20 @@ if page == "Dashboard":
         st.plotly_chart(fig, use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
-    # AI Accuracy Over Time
-    accuracy_data = []
-    for run in recent_runs:
-        changes = [h for h in run['history'] if h.get('action') == 'Changed']
-        accuracy_data.append({
-            'timestamp': datetime.strptime(run['timestamp'], "%Y-%m-%d %H:%M:%S"),
-            'accurate': len(changes) == 0
-        })
-
-    accuracy_df = pd.DataFrame(accuracy_data)
+    # AI Accuracy Over Time: runs and unchanged runs per timestamp, accumulated in order
+    accuracy_df = pd.DataFrame(run_repository.accuracy_by_timestamp(), columns=['timestamp', 'runs', 'accurate'])
     if not accuracy_df.empty:
-        accuracy_df['cumulative_accuracy'] = (accuracy_df['accurate'].cumsum() / 
-                                            (pd.Series(range(1, len(accuracy_df) + 1))) * 100)
+        accuracy_df['timestamp'] = pd.to_datetime(accuracy_df['timestamp'], format="%Y-%m-%d %H:%M:%S")
+        accuracy_df['cumulative_accuracy'] = accuracy_df['accurate'].cumsum() / accuracy_df['runs'].cumsum() * 100
 
         with st.container():
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
             st.markdown('<div class="metric-title">AI ACCURACY TREND</div>', unsafe_allow_html=True)
             st.markdown(f'<div class="metric-subtitle">Current accuracy: {accuracy_rate:.1f}%</div>', unsafe_allow_html=True)
             
+            # WebGL traces, which plotly switches to past 1000 points, cannot draw splines
             fig = px.line(accuracy_df, x='timestamp', y='cumulative_accuracy',
-                         line_shape='spline')
+                         line_shape='spline', render_mode='svg')
             fig.update_traces(line_color='#a742ff')
             fig.update_layout(
                 height=200,
@@ -824,10 +1401,7 @@ if page == "Dashboard":
     st.markdown('<div class="metric-row">', unsafe_allow_html=True)
 
     # Category Distribution Bar Chart
-    category_counts = {}
-    for run in recent_runs:
-        current_category = run['recommended_category']
-        category_counts[current_category] = category_counts.get(current_category, 0) + 1
+    category_counts = run_repository.category_counts()
 
     with st.container():
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
@@ -850,19 +1424,16 @@ if page == "Dashboard":
         st.plotly_chart(fig, use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
-    # Recent Activity Timeline
-    recent_changes = [h for run in recent_runs for h in run['history'] if h.get('action') in ['Changed', 'Validated']]
-    recent_changes.sort(key=lambda x: x['timestamp'], reverse=True)
+    # Recent Activity Timeline: reviewer events per hour, counted in the event table
+    activity_df = pd.DataFrame(run_repository.activity_by_hour(), columns=['timestamp', 'count'])
 
     with st.container():
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         st.markdown('<div class="metric-title">ACTIVITY TIMELINE</div>', unsafe_allow_html=True)
-        st.markdown(f'<div class="metric-subtitle">{len(recent_changes)} recent changes</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="metric-subtitle">{activity_df["count"].sum()} recent changes</div>', unsafe_allow_html=True)
         
-        activity_df = pd.DataFrame(recent_changes)
         if not activity_df.empty:
             activity_df['timestamp'] = pd.to_datetime(activity_df['timestamp'])
-            activity_df['count'] = 1
             activity_df = activity_df.resample('H', on='timestamp')['count'].sum().reset_index()
             
             fig = px.bar(activity_df, x='timestamp', y='count',
@@ -886,67 +1457,109 @@ elif page == "Upload Skills":
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            uploaded_file = st.file_uploader(
-                "Choose a CSV or Excel file",
-                type=["csv", "xlsx"],
-                help="Upload a file containing work experience descriptions or skills"
+            uploaded_files = st.file_uploader(
+                "Choose CSV, Excel, Parquet or Arrow files (CSV may be gzipped or zipped)",
+                type=list(UPLOAD_FORMATS),
+                accept_multiple_files=True,
+                help="Upload one or more files containing work experience descriptions or skills; "
+                     "several files are processed together as one job"
             )
             
         with col2:
             st.markdown("#### File Requirements")
             st.markdown("""
-                - CSV or Excel format
+                - CSV (plain, .csv.gz or .zip), Excel, Parquet or Arrow IPC format
                 - One skill per row
                 - Headers included
             """)
     
-    if uploaded_file:
-        st.success("File uploaded successfully!")
+    if uploaded_files:
+        st.success("File uploaded successfully!" if len(uploaded_files) == 1
+                   else f"{len(uploaded_files)} files uploaded successfully!")
         
         # Preview section
         with st.expander("Preview Uploaded Data", expanded=True):
             st.markdown("#### File Preview")
             
+            preview_file = uploaded_files[0]
+            if len(uploaded_files) > 1:
+                preview_name = st.selectbox("File", [file.name for file in uploaded_files])
+                preview_file = next(file for file in uploaded_files if file.name == preview_name)
             try:
-                # Read the file based on its type
-                if uploaded_file.name.endswith('.csv'):
-                    df = pd.read_csv(uploaded_file)
-                else:  # Excel file
-                    df = pd.read_excel(uploaded_file)
+                # Only the first rows are parsed; the row count comes from a separate cheap pass
+                preview = read_upload_preview(preview_file)
+                total_rows = get_upload_row_count(preview_file.file_id, preview_file)
                 
                 # Display file info
                 st.markdown(f"**File Info:**")
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.markdown(f"Rows: {df.shape[0]}")
+                    if total_rows is None:
+                        st.markdown("Rows: unknown")
+                    elif upload_format(preview_file.name) in COMPRESSED_FORMATS:
+                        st.markdown(f"Rows: about {total_rows:,} (estimated; the job reports the exact count)")
+                    else:
+                        st.markdown(f"Rows: {total_rows:,}")
                 with col2:
-                    st.markdown(f"Columns: {df.shape[1]}")
+                    st.markdown(f"Columns: {preview.shape[1]}")
                 with col3:
-                    st.markdown(f"File type: {uploaded_file.type}")
+                    st.markdown(f"File type: {preview_file.type}")
                 
                 # Display column names
                 st.markdown("**Columns:**")
-                st.write(", ".join(df.columns.tolist()))
+                st.write(", ".join(map(str, preview.columns)))
                 
                 # Show first few rows of data
                 st.markdown("**Data Preview:**")
                 st.dataframe(
-                    df.head(5),
+                    preview,
                     use_container_width=True
                 )
-                
+
+                # The same checks the job runs, applied to the preview rows
+                preview_description_column = find_column(preview, SKILL_DESCRIPTION_COLUMNS)
+                if preview_description_column is not None:
+                    _, preview_report = UploadValidator().validate(
+                        preview, find_column(preview, SKILL_NAME_COLUMNS), preview_description_column)
+                    if len(preview_report):
+                        st.markdown("**Validation:**")
+                        st.dataframe(preview_report, use_container_width=True, hide_index=True)
+                        st.caption("Rejected rows are left out when processing; flagged rows are cleaned and kept. "
+                                   "The job's rejects report lists every such row.")
+
             except Exception as e:
                 st.error(f"Error reading file: {str(e)}")
                 st.markdown("Please ensure your file is properly formatted with headers and data.")
         
         if st.button("Process Skills", type="primary"):
-            with st.spinner("Processing skills..."):
-                st.session_state.processing = True
-                # Add processing logic here
-                st.success("✅ Processing complete! View results in the Recent Runs tab.")
+            uploads, unusable = [], []
+            for uploaded_file in uploaded_files:
+                try:
+                    header = pd.DataFrame(columns=read_upload_columns(uploaded_file))
+                except Exception as e:
+                    st.error(f"Error reading {uploaded_file.name}: {str(e)}")
+                    continue
+                description_column = find_column(header, SKILL_DESCRIPTION_COLUMNS)
+                if description_column is None:
+                    unusable.append(uploaded_file.name)
+                else:
+                    uploads.append((uploaded_file, find_column(header, SKILL_NAME_COLUMNS), description_column))
+            if unusable:
+                st.error(f"No skill description column found in {', '.join(unusable)}. Expected one of: "
+                         + ", ".join(SKILL_DESCRIPTION_COLUMNS))
+            if uploads:
+                # Runs in the background; progress is polled from the sidebar on any page
+                job_id, reused = start_upload_job(uploads)
+                for file_name, earlier_job in reused.items():
+                    st.success(f"✅ {file_name} was already processed under the current taxonomy as job "
+                               f"{earlier_job}. Its results are in the Recent History tab.")
+                if job_id is not None:
+                    st.success(f"✅ Processing started as job {job_id}. Follow its progress in the sidebar; "
+                               "results appear in the Recent History tab as they are categorized.")
 
 elif page == "Recent History":
     st.markdown("### Recent Categorization History")
+    run_repository = get_run_repository()
     
     # Add search and filter functionality
     st.markdown('<div class="search-container">', unsafe_allow_html=True)
@@ -960,7 +1573,7 @@ elif page == "Recent History":
     with filter_col2:
         run_id_filter = st.selectbox(
             "Filter by Run",
-            options=["All"] + [run["run_id"] for run in recent_runs],
+            options=["All"] + run_repository.run_ids(RUN_FILTER_OPTIONS),
             index=0
         )
     
@@ -972,16 +1585,24 @@ elif page == "Recent History":
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Apply filters
-    filtered_runs = recent_runs
+    run_filter = None if run_id_filter == "All" else run_id_filter
     
-    # Apply run ID filter
-    if run_id_filter != "All":
-        filtered_runs = [run for run in filtered_runs if run["run_id"] == run_id_filter]
+    # Apply search filter once the search button is clicked; it stays applied while paging
+    if search_button:
+        st.session_state.history_search = search_query
+    skill_search = st.session_state.get("history_search") or None
     
-    # Apply search filter if search button is clicked
-    if search_query and search_button:
-        filtered_runs = [run for run in filtered_runs 
-                        if search_query.lower() in run['input_skill'].lower()]
+    # Only the shown page of runs is read, newest first
+    matching_runs = run_repository.count(run_filter, skill_search)
+    page_count = max(1, -(-matching_runs // HISTORY_PAGE_SIZE))
+    history_page = 1
+    if page_count > 1:
+        history_page = st.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, value=1,
+                                       step=1, key=f"history_page_{run_filter}_{skill_search}")
+    page_offset = (history_page - 1) * HISTORY_PAGE_SIZE
+    filtered_runs = run_repository.page(HISTORY_PAGE_SIZE, page_offset, run_filter, skill_search)
+    if filtered_runs:
+        st.caption(f"Runs {page_offset + 1:,}–{page_offset + len(filtered_runs):,} of {matching_runs:,}, newest first")
     
     if not filtered_runs:
         st.info("No skills found matching your criteria.")
@@ -1013,6 +1634,8 @@ elif page == "Recent History":
                 st.markdown(f"_{run['run_id']}_")
             with cols[1]:
                 st.markdown(f"**{run['input_skill']}**")
+                if run.get("source_file"):
+                    st.caption(run["source_file"])
             with cols[2]:
                 st.markdown(f"_{run['recommended_category']}_")
             with cols[3]:
@@ -1040,7 +1663,7 @@ if st.session_state.show_validation_dialog:
             st.session_state.selected_skill = None
             st.experimental_rerun()  # Rerun the app to refresh the state
         
-        skill_data = next((run for run in recent_runs if run['run_id'] in st.session_state.selected_skills), None)
+        skill_data = get_run_repository().get(st.session_state.selected_skills[0])
         
         # Display skill description
         st.markdown('<div class="section-title">Skill Details</div>', unsafe_allow_html=True)
@@ -1054,8 +1677,16 @@ if st.session_state.show_validation_dialog:
         
         # Get category matches and related skills
         category_matches = get_category_match_scores(skill_data["skill_description"])
+        skill_catalog = get_skill_catalog()
+        if skill_catalog is None:
+            st.caption("The skill catalog is still being indexed; related skills come from the built-in lists "
+                       "until it is ready.")
+        elif os.path.exists(SKILL_CATALOG_PATH) and not len(skill_catalog.names):
+            st.warning(f"{SKILL_CATALOG_PATH} has no skill name column (expected one of: "
+                       f"{', '.join(SKILL_NAME_COLUMNS)}), so related skills come from the built-in lists.")
         
         # Current category with match score
+        taxonomy_tree = get_taxonomy_tree()
         current_category = skill_data.get("recommended_category", "Uncategorized")
         current_score = category_matches.get(current_category, {}).get("score", 0)
         current_related_skills = category_matches.get(current_category, {}).get("related_skills", [])
@@ -1064,6 +1695,7 @@ if st.session_state.show_validation_dialog:
         st.markdown('<div class="section-title">Current Category</div>', unsafe_allow_html=True)
         st.markdown(
             f'<div class="category-card">'
+            f'<div class="category-path">{PATH_SEPARATOR.join(taxonomy_tree.path(current_category))}</div>'
             f'<div class="category-name">{current_category}</div>'
             f'<div class="category-score">Match Score: {current_score:.7f}</div>'
             f'<div class="related-skills">Related Skills: {", ".join(current_related_skills)}</div>'
@@ -1076,17 +1708,21 @@ if st.session_state.show_validation_dialog:
         
         # Alternative categories
         st.markdown('<div class="section-title">Possible Alternative Categories</div>', unsafe_allow_html=True)
-        sorted_categories = sorted(
-            [(cat, data["score"], data["related_skills"]) 
-             for cat, data in category_matches.items() 
-             if cat != current_category],
-            key=lambda x: x[1],
-            reverse=True
-        )
+        # Partial top-k selection: no full sort over the taxonomy on every rerun
+        match_categories = list(category_matches)
+        match_scores = np.array([category_matches[cat]["score"] for cat in match_categories], dtype=np.float32)
+        current_index = match_categories.index(current_category) if current_category in category_matches else -1
+        top_indices, top_scores = select_top_k(match_scores, ALTERNATIVE_CATEGORY_COUNT, exclude=[current_index])
+        top_alternatives = [
+            (match_categories[i], float(score), category_matches[match_categories[i]]["related_skills"])
+            for i, score in zip(top_indices[0], top_scores[0])
+            if np.isfinite(score)
+        ]
         
-        for cat, score, related_skills in sorted_categories[:4]:
+        for cat, score, related_skills in top_alternatives:
             st.markdown(
                 f'<div class="alternative-card">'
+                f'<div class="category-path">{PATH_SEPARATOR.join(taxonomy_tree.path(cat))}</div>'
                 f'<div class="category-name">{cat}</div>'
                 f'<div class="category-score">Match Score: {score:.7f}</div>'
                 f'<div class="related-skills">Related Skills: {", ".join(related_skills)}</div>'
@@ -1112,13 +1748,21 @@ if st.session_state.show_validation_dialog:
         st.markdown("<div style='height: 20px'></div>", unsafe_allow_html=True)
         
         # Add buttons for accepting or changing the category
+        shown_alternatives = {cat for cat, _, _ in top_alternatives}
         if new_category := st.selectbox(
             "Change Category",
-            options=[cat for cat, _, _ in sorted_categories],
+            # Best alternatives first, then the rest of the taxonomy in its own order
+            options=[cat for cat, _, _ in top_alternatives] + [
+                cat for cat in match_categories
+                if cat != current_category and cat not in shown_alternatives
+            ],
             key="category_change"
         ):
             if st.button("Apply Category Change", use_container_width=True):
-                new_source = f"Changed to {new_category} by {st.session_state.get('user_id', 'unknown')} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                reviewer = st.session_state.get('user_id', 'unknown')
+                changed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                new_source = f"Changed to {new_category} by {reviewer} at {changed_at}"
+                record_category_change(skill_data, new_category, reviewer, changed_at)
                 st.success(f"Category changed to {new_category}. New source: {new_source}")
         
         st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""Near-duplicate detection for uploaded skill descriptions (MinHash + LSH)"""
+import re
+import zlib
+from itertools import chain, islice
+
+import numpy as np
+
+# Words per shingle; descriptions shorter than this use all their words as one shingle
+SHINGLE_SIZE = 3
+
+# Signature length = LSH_BANDS * LSH_ROWS; the LSH candidate threshold is about
+# (1 / LSH_BANDS) ** (1 / LSH_ROWS), roughly 0.7 Jaccard similarity here
+LSH_BANDS = 16
+LSH_ROWS = 8
+
+# Estimated Jaccard similarity a candidate must reach to join its group
+DEFAULT_THRESHOLD = 0.8
+
+# Shingles hashed per block, whatever documents they come from; bounds each
+# (shingles, permutations) uint64 working array to 4 MB at 128 permutations
+MINHASH_BLOCK_SHINGLES = 4096
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _shingles(text):
+    words = _WORD_PATTERN.findall(text.lower()) if isinstance(text, str) else []
+    if len(words) <= SHINGLE_SIZE:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+
+def minhash_signatures(texts, num_perm=LSH_BANDS * LSH_ROWS, seed=0):
+    """Return a (len(texts), num_perm) uint64 MinHash signature matrix over word shingles.
+
+    Each permutation is the multiply-add hash (a * x + b) mod 2**64 of the shingle's
+    CRC-32 x, with a random odd 64-bit a and random 64-bit b. The product wraps, so the order of
+    the hashes is unrelated to the order of x and every permutation picks its own
+    minimum; for 32-bit x this family is universal in its high bits, which decide
+    the minimum. Shingles are hashed MINHASH_BLOCK_SHINGLES at a time, so working
+    memory does not depend on how long the descriptions are.
+    """
+    rng = np.random.default_rng(seed)
+    max_word = np.iinfo(np.uint64).max
+    a = rng.integers(0, max_word, num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, max_word, num_perm, dtype=np.uint64, endpoint=True)
+
+    signatures = np.full((len(texts), num_perm), max_word, dtype=np.uint64)
+    # (row, shingle hash) pairs, flattened so np.fromiter can read them a block at a time
+    pairs = chain.from_iterable((row, zlib.crc32(shingle.encode("utf-8")))
+                                for row, text in enumerate(texts) for shingle in _shingles(text))
+    while True:
+        block = np.fromiter(islice(pairs, 2 * MINHASH_BLOCK_SHINGLES), dtype=np.uint64).reshape(-1, 2)
+        if not len(block):
+            return signatures
+        rows = block[:, 0].astype(np.intp)
+        permuted = block[:, 1:] * a + b
+        # A document's shingles are contiguous, though they may continue in the next block
+        starts = np.flatnonzero(np.concatenate([[True], rows[1:] != rows[:-1]]))
+        rows = rows[starts]
+        signatures[rows] = np.minimum(signatures[rows], np.minimum.reduceat(permuted, starts, axis=0))
+
+
+def near_duplicate_groups(texts, threshold=DEFAULT_THRESHOLD, bands=LSH_BANDS, rows=LSH_ROWS, seed=0):
+    """Return, for every text, the position of its group's representative.
+
+    Texts sharing an LSH bucket in any band are linked, groups are closed
+    transitively, and each member is then kept only if its signature agrees with the
+    representative's on at least threshold of the permutations; the rest stand alone.
+    Representatives map to themselves.
+    """
+    texts = list(texts)
+    if not texts:
+        return np.empty(0, dtype=np.intp)
+    signatures = minhash_signatures(texts, bands * rows, seed)
+
+    band_buckets = []
+    for band in range(bands):
+        band_slice = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        _, buckets = np.unique(band_slice.view(f"V{band_slice.dtype.itemsize * rows}").ravel(), return_inverse=True)
+        band_buckets.append(buckets)
+
+    # Propagate the smallest row number through shared buckets until nothing changes
+    labels = np.arange(len(texts))
+    while True:
+        previous = labels.copy()
+        for buckets in band_buckets:
+            smallest = np.full(buckets.max() + 1, len(texts))
+            np.minimum.at(smallest, buckets, labels)
+            labels = np.minimum(labels, smallest[buckets])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+
+    agreement = (signatures == signatures[labels]).mean(axis=1)
+    return np.where(agreement >= threshold, labels, np.arange(len(texts)))
+
+
+def categorize_deduplicated(skill_descriptions, categorize, threshold=DEFAULT_THRESHOLD):
+    """Run categorize on one representative per near-duplicate group and fan results out.
+
+    categorize takes and returns Series-indexed DataFrames like scoring.categorize_batch.
+    The result is aligned with skill_descriptions and gains a duplicate_of column
+    holding the index label of each row's representative.
+    """
+    representatives = near_duplicate_groups(skill_descriptions.tolist(), threshold)
+    unique_rows = np.unique(representatives)
+    results = categorize(skill_descriptions.iloc[unique_rows])
+    results = results.iloc[np.searchsorted(unique_rows, representatives)]
+    results.index = skill_descriptions.index
+    results["duplicate_of"] = skill_descriptions.index[representatives]
+    return results
@@ -0,0 +1,485 @@
+"""Chunked, memory-bounded reading of uploaded skill files"""
+import gzip
+import io
+import os
+import queue
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+# Rows parsed first to measure how much memory a row takes
+PROBE_ROWS = 1000
+
+# Upper bound on rows per chunk, whatever the memory limit allows
+MAX_CHUNK_ROWS = 100_000
+
+# Peak working memory per chunk as a multiple of its parsed size: the chunk itself,
+# the cleaned description column, the results frame and the run records built from it
+CHUNK_MEMORY_OVERHEAD = 4
+
+DEFAULT_MEMORY_LIMIT_MB = 256
+
+# Rows per DataFrame yielded by iter_excel_chunks
+EXCEL_CHUNK_ROWS = 10_000
+
+# File extensions accepted for upload and the reader family each uses
+UPLOAD_FORMATS = {"csv": "csv", "gz": "gzip", "zip": "zip", "xlsx": "excel", "parquet": "parquet", "arrow": "arrow",
+                  "feather": "arrow"}
+
+# Reader families whose row count is only estimated, since counting would inflate them
+COMPRESSED_FORMATS = ("gzip", "zip")
+
+# Rows parsed for the upload preview
+PREVIEW_ROWS = 5
+
+# Bytes read at a time when counting lines
+LINE_COUNT_BLOCK_SIZE = 1 << 20
+
+# Inflated bytes of a compressed upload sampled to measure its bytes per line
+ROW_ESTIMATE_SAMPLE_BYTES = 1 << 20
+
+# Bytes that are not valid UTF-8 become U+FFFD rather than failing the read; validation flags them
+CSV_ENCODING_ERRORS = "replace"
+
+
+def rows_per_chunk(sample, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB):
+    """Rows per chunk that keep a chunk like sample within memory_limit_mb while it is processed"""
+    if not len(sample):
+        return MAX_CHUNK_ROWS
+    bytes_per_row = sample.memory_usage(index=True, deep=True).sum() / len(sample)
+    rows = int(memory_limit_mb * 2**20 / (bytes_per_row * CHUNK_MEMORY_OVERHEAD))
+    return max(1, min(rows, MAX_CHUNK_ROWS))
+
+
+def read_csv_header(source):
+    """Column names of a CSV file or buffer, leaving a buffer rewound"""
+    columns = pd.read_csv(source, nrows=0, encoding_errors=CSV_ENCODING_ERRORS).columns.tolist()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return columns
+
+
+def iter_csv_chunks(source, columns=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, chunk_rows=None):
+    """Yield DataFrame chunks of a CSV file or buffer without holding the whole file.
+
+    columns limits parsing to the named columns. Unless chunk_rows is given, the first
+    PROBE_ROWS rows are measured and the rest is read in chunks sized by rows_per_chunk.
+    """
+    reader = pd.read_csv(source, usecols=columns, chunksize=chunk_rows or PROBE_ROWS,
+                         encoding_errors=CSV_ENCODING_ERRORS)
+    with reader:
+        if chunk_rows is None:
+            try:
+                probe = reader.get_chunk(PROBE_ROWS)
+            except StopIteration:
+                return
+            yield probe
+            chunk_rows = rows_per_chunk(probe, memory_limit_mb)
+        while True:
+            try:
+                yield reader.get_chunk(chunk_rows)
+            except StopIteration:
+                return
+
+
+def read_csv_preview(source, nrows=PREVIEW_ROWS):
+    """First nrows rows of a CSV file or buffer, leaving a buffer rewound"""
+    preview = pd.read_csv(source, nrows=nrows, encoding_errors=CSV_ENCODING_ERRORS)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return preview
+
+
+def _count_lines(handle):
+    lines, last = 0, b"\n"
+    for block in iter(lambda: handle.read(LINE_COUNT_BLOCK_SIZE), b""):
+        lines += block.count(b"\n")
+        last = block[-1:]
+    # A final line without a trailing newline still holds a row; the header is not one
+    return max(lines + (last != b"\n") - 1, 0)
+
+
+def count_csv_rows(source):
+    """Data rows in a CSV file or binary buffer, counted from line breaks without parsing.
+
+    Quoted fields containing line breaks are counted once per line, so the result is
+    an upper bound for such files.
+    """
+    handle = open(source, "rb") if isinstance(source, str) else source
+    try:
+        handle.seek(0)
+        return _count_lines(handle)
+    finally:
+        if handle is source:
+            handle.seek(0)
+        else:
+            handle.close()
+
+
+def _compressed_members(source, compression):
+    """Binary streams of the CSV data in a gzip file or zip bundle, inflated only as they are read"""
+    if compression == "gzip":
+        with gzip.open(source) as stream:
+            yield stream
+        return
+    with zipfile.ZipFile(source) as bundle:
+        for member in _csv_members(bundle):
+            with bundle.open(member) as stream:
+                yield stream
+
+
+def _csv_members(bundle):
+    return [member for member in bundle.infolist() if not member.is_dir()
+            and member.filename.lower().endswith(".csv") and not member.filename.startswith("__MACOSX/")]
+
+
+def _first_member(source, compression, read):
+    members = _compressed_members(source, compression)
+    try:
+        stream = next(members, None)
+        if stream is None:
+            raise ValueError("No CSV file found in the compressed upload")
+        return read(stream)
+    finally:
+        members.close()
+
+
+def read_compressed_header(source, compression):
+    """Column names of the first CSV in a gzip file or zip bundle"""
+    return _first_member(source, compression, read_csv_header)
+
+
+def read_compressed_preview(source, compression, nrows=PREVIEW_ROWS):
+    """First nrows rows of the first CSV in a gzip file or zip bundle"""
+    return _first_member(source, compression, lambda stream: read_csv_preview(stream, nrows))
+
+
+def _gzip_inflated_size(source):
+    handle = open(source, "rb") if isinstance(source, str) else source
+    try:
+        compressed = handle.seek(0, os.SEEK_END)
+        handle.seek(max(compressed - 4, 0))
+        size = int.from_bytes(handle.read(4), "little")
+    finally:
+        if handle is source:
+            handle.seek(0)
+        else:
+            handle.close()
+    # The trailer holds the size modulo 2**32; below the compressed size it has wrapped
+    return size if size >= compressed else None
+
+
+def estimate_compressed_rows(source, compression):
+    """Data rows across the CSVs of a gzip file or zip bundle, estimated without inflating them.
+
+    The inflated size recorded in the zip directory or gzip trailer is divided by the
+    bytes per line of the first ROW_ESTIMATE_SAMPLE_BYTES. Returns None when the size
+    is not usable, e.g. a gzip that inflates past 4 GB.
+    """
+    if compression == "gzip":
+        size = _gzip_inflated_size(source)
+    else:
+        with zipfile.ZipFile(source) as bundle:
+            size = sum(member.file_size for member in _csv_members(bundle))
+        if hasattr(source, "seek"):
+            source.seek(0)
+    sample = _first_member(source, compression, lambda stream: stream.read(ROW_ESTIMATE_SAMPLE_BYTES))
+    if size is None or not sample:
+        return None
+    if len(sample) >= size:
+        return _count_lines(io.BytesIO(sample))
+    lines = sample.count(b"\n")
+    return max(round(size * lines / len(sample)) - 1, 0) if lines else None
+
+
+def iter_compressed_chunks(source, compression, columns=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB):
+    """Yield DataFrame chunks of the CSVs in a gzip file or zip bundle, one member after another.
+
+    Each member is inflated as the CSV parser reads it, so neither an unpacked file nor
+    a fully inflated buffer is ever held.
+    """
+    for stream in _compressed_members(source, compression):
+        yield from iter_csv_chunks(stream, columns, memory_limit_mb)
+
+
+def _excel_header(row):
+    return [f"Unnamed: {position}" if value is None else str(value) for position, value in enumerate(row)]
+
+
+def read_excel_header(source):
+    """Column names from the first row of the first worksheet, read in read-only mode"""
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        first_row = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+        return _excel_header(first_row)
+    finally:
+        workbook.close()
+        if hasattr(source, "seek"):
+            source.seek(0)
+
+
+def excel_row_count(source):
+    """Data rows in the first worksheet according to its stored dimensions, or None if not recorded"""
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        max_row = workbook.worksheets[0].max_row
+        return None if max_row is None else max(max_row - 1, 0)
+    finally:
+        workbook.close()
+        if hasattr(source, "seek"):
+            source.seek(0)
+
+
+def iter_excel_chunks(source, columns=None, chunk_rows=EXCEL_CHUNK_ROWS):
+    """Yield DataFrame chunks of chunk_rows rows from the first worksheet of an .xlsx file.
+
+    Rows are streamed with openpyxl's read-only iterator, so only one chunk is held at
+    a time. The first row is the header; columns limits the result to the named
+    columns and fully empty rows are skipped, as pd.read_excel does at the sheet end.
+    """
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = _excel_header(next(rows, ()))
+        positions = [header.index(column) for column in columns] if columns is not None else range(len(header))
+        names = [header[position] for position in positions]
+        rows = (row for row in rows if any(value is not None for value in row))
+        while True:
+            chunk = [[row[position] if position < len(row) else None for position in positions]
+                     for row in islice(rows, chunk_rows)]
+            if not chunk:
+                return
+            yield pd.DataFrame(chunk, columns=names)
+    finally:
+        workbook.close()
+
+
+def read_excel_preview(source, nrows=PREVIEW_ROWS):
+    """First nrows rows of the first worksheet, read in read-only mode"""
+    chunks = iter_excel_chunks(source, chunk_rows=nrows)
+    preview = next(chunks, None)
+    chunks.close()
+    if preview is None:
+        preview = pd.DataFrame(columns=read_excel_header(source))
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return preview
+
+
+def _arrow_chunk_rows(probe, chunk_rows, memory_limit_mb):
+    return chunk_rows or rows_per_chunk(probe.slice(0, PROBE_ROWS).to_pandas(), memory_limit_mb)
+
+
+def read_parquet_header(source):
+    """Column names from the Parquet footer"""
+    return pq.ParquetFile(source).schema_arrow.names
+
+
+def parquet_row_count(source):
+    """Row count from the Parquet footer"""
+    return pq.ParquetFile(source).metadata.num_rows
+
+
+def iter_parquet_chunks(source, columns=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, chunk_rows=None):
+    """Yield DataFrame chunks of a Parquet file, reading only the given columns.
+
+    Row groups are decoded one batch at a time, so a wide export costs only the bytes
+    of the projected columns. Unless chunk_rows is given, batches are sized by
+    rows_per_chunk from the first PROBE_ROWS rows.
+    """
+    parquet_file = pq.ParquetFile(source)
+    if parquet_file.metadata.num_rows == 0:
+        return
+    probe = next(parquet_file.iter_batches(batch_size=PROBE_ROWS, columns=columns))
+    batch_size = _arrow_chunk_rows(probe, chunk_rows, memory_limit_mb)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+
+def read_parquet_preview(source, nrows=PREVIEW_ROWS):
+    """First nrows rows of a Parquet file"""
+    parquet_file = pq.ParquetFile(source)
+    batch = next(parquet_file.iter_batches(batch_size=nrows), None)
+    return batch.to_pandas() if batch is not None else parquet_file.schema_arrow.empty_table().to_pandas()
+
+
+def _open_arrow(source):
+    # Paths are memory-mapped and in-memory uploads wrapped without copying, so only
+    # the buffers of the columns actually read are touched
+    if isinstance(source, str):
+        source = pa.memory_map(source)
+    elif hasattr(source, "getbuffer"):
+        source = pa.BufferReader(pa.py_buffer(source.getbuffer()))
+    try:
+        return pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        # Not the random-access file format; fall back to the streaming format
+        source.seek(0)
+        return pa.ipc.open_stream(source)
+
+
+def _arrow_batches(reader):
+    if isinstance(reader, pa.ipc.RecordBatchFileReader):
+        return (reader.get_batch(position) for position in range(reader.num_record_batches))
+    return iter(reader)
+
+
+def read_arrow_header(source):
+    """Column names from an Arrow IPC file or stream schema"""
+    return _open_arrow(source).schema.names
+
+
+def arrow_row_count(source):
+    """Rows in an Arrow IPC file, summed from its batch headers; None for the streaming format"""
+    reader = _open_arrow(source)
+    if not isinstance(reader, pa.ipc.RecordBatchFileReader):
+        return None
+    return sum(batch.num_rows for batch in _arrow_batches(reader))
+
+
+def iter_arrow_chunks(source, columns=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, chunk_rows=None):
+    """Yield DataFrame chunks of an Arrow IPC file or stream, converting only the given columns"""
+    reader = _open_arrow(source)
+    rows = None
+    for batch in _arrow_batches(reader):
+        if columns is not None:
+            batch = batch.select(columns)
+        if rows is None and batch.num_rows:
+            rows = _arrow_chunk_rows(batch, chunk_rows, memory_limit_mb)
+        for start in range(0, batch.num_rows, rows or 1):
+            yield batch.slice(start, rows).to_pandas()
+
+
+def read_arrow_preview(source, nrows=PREVIEW_ROWS):
+    """First nrows rows of an Arrow IPC file or stream"""
+    reader = _open_arrow(source)
+    batch = next(_arrow_batches(reader), None)
+    return batch.slice(0, nrows).to_pandas() if batch is not None else reader.schema.empty_table().to_pandas()
+
+
+def upload_format(file_name):
+    """Reader family for a file name ("csv", "gzip", "zip", "excel", "parquet" or "arrow"), or None"""
+    return UPLOAD_FORMATS.get(file_name.rsplit(".", 1)[-1].lower())
+
+
+def read_header(source, file_format):
+    """Column names of a file or buffer in file_format, leaving a buffer rewound"""
+    if file_format in COMPRESSED_FORMATS:
+        return _rewound(source, lambda handle: read_compressed_header(handle, file_format))
+    readers = {"csv": read_csv_header, "excel": read_excel_header,
+               "parquet": read_parquet_header, "arrow": read_arrow_header}
+    return _rewound(source, readers[file_format])
+
+
+def read_preview(source, file_format, nrows=PREVIEW_ROWS):
+    """First nrows rows of a file or buffer in file_format, leaving a buffer rewound"""
+    if file_format in COMPRESSED_FORMATS:
+        return _rewound(source, lambda handle: read_compressed_preview(handle, file_format, nrows))
+    readers = {"csv": read_csv_preview, "excel": read_excel_preview,
+               "parquet": read_parquet_preview, "arrow": read_arrow_preview}
+    return _rewound(source, lambda handle: readers[file_format](handle, nrows))
+
+
+def count_rows(source, file_format):
+    """Data rows of a file or buffer in file_format from its cheapest source, or None if unknown.
+
+    For COMPRESSED_FORMATS this is an estimate; the job reading the file reports the real count.
+    """
+    if file_format in COMPRESSED_FORMATS:
+        return _rewound(source, lambda handle: estimate_compressed_rows(handle, file_format))
+    counters = {"csv": count_csv_rows, "excel": excel_row_count,
+                "parquet": parquet_row_count, "arrow": arrow_row_count}
+    return _rewound(source, counters[file_format])
+
+
+def iter_chunks(source, file_format, columns=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB):
+    """Yield DataFrame chunks of a file or buffer in file_format, parsing only the given columns"""
+    if file_format == "csv":
+        return iter_csv_chunks(source, columns, memory_limit_mb)
+    if file_format in COMPRESSED_FORMATS:
+        return iter_compressed_chunks(source, file_format, columns, memory_limit_mb)
+    if file_format == "excel":
+        return iter_excel_chunks(source, columns)
+    if file_format == "parquet":
+        return iter_parquet_chunks(source, columns, memory_limit_mb)
+    return iter_arrow_chunks(source, columns, memory_limit_mb)
+
+
+def _rewound(source, read):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    try:
+        return read(source)
+    finally:
+        if hasattr(source, "seek"):
+            source.seek(0)
+
+
+def merge_chunk_streams(streams, max_workers=None, max_pending=None):
+    """Yield (stream position, chunk) from several chunk iterators read concurrently.
+
+    Each stream is consumed on a worker thread (the pandas, pyarrow and zlib parsers
+    release the GIL), so reading several files takes about as long as the largest.
+    Chunks of one stream keep their order; at most max_pending parsed chunks wait to be
+    consumed, which bounds memory. A reader's exception is raised here, and closing
+    the generator stops the readers.
+    """
+    max_workers = max_workers or len(streams)
+    pending = queue.Queue(max_pending or 2 * max_workers)
+    stop = threading.Event()
+    finished = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read(position, stream):
+        try:
+            for chunk in stream:
+                if not put((position, chunk)):
+                    return
+        except Exception as e:
+            put((position, e))
+        finally:
+            put((position, finished))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload-parse")
+    for position, stream in enumerate(streams):
+        executor.submit(read, position, stream)
+    try:
+        remaining = len(streams)
+        while remaining:
+            position, item = pending.get()
+            if item is finished:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield position, item
+    finally:
+        stop.set()
+        # Streams still waiting for a worker are never started once we stop early
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def skip_leading_rows(chunks, rows):
+    """Drop the first rows rows from a stream of DataFrame chunks, e.g. to resume after a checkpoint"""
+    for chunk in chunks:
+        if rows >= len(chunk):
+            rows -= len(chunk)
+            continue
+        yield chunk.iloc[rows:] if rows else chunk
+        rows = 0
+
@@ -0,0 +1,200 @@
+"""Background job queue whose progress and checkpoints are kept in SQLite"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Jobs processed at once; the rest wait in submission order
+DEFAULT_MAX_WORKERS = 1
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+_COLUMNS = ("job_id", "name", "kind", "params", "status", "total_rows", "rows_done", "chunks_done", "start_rows",
+            "detail", "error", "created_at", "started_at", "finished_at")
+
+
+class JobContext:
+    """What a running job's work function sees: its parameters and last checkpoint.
+
+    Work is done in numbered chunks. commit_chunk() stores a chunk's results and moves
+    the checkpoint past it in one transaction, so after a restart the job resumes at
+    chunks_done / rows_done and no chunk is ever committed twice.
+    """
+
+    def __init__(self, queue, job_id, params, created_at, rows_done, chunks_done):
+        self._queue = queue
+        self.job_id = job_id
+        self.params = params
+        self.created_at = created_at
+        self.rows_done = rows_done
+        self.chunks_done = chunks_done
+
+    def committed_chunks(self):
+        """Payloads of the chunks committed so far, in chunk order"""
+        return self._queue._committed_chunks(self.job_id)
+
+    def commit_chunk(self, chunk, rows_done, payload, detail=None):
+        """Store chunk's payload and checkpoint rows_done; returns False if chunk was already committed"""
+        committed = self._queue._commit_chunk(self.job_id, chunk, rows_done, payload, detail)
+        if committed:
+            self.rows_done = rows_done
+            self.chunks_done = chunk + 1
+        return committed
+
+
+class JobQueue:
+    """Runs submitted jobs on worker threads and records their progress in SQLite.
+
+    A job is a kind and JSON-serialisable params; handlers[kind](params) builds its
+    work function in the submitting thread, and the work is then called with a
+    JobContext on a worker thread. Any session can poll a job's progress, throughput
+    and ETA through get() and recent(). Jobs cut short by a restart are queued again
+    from their last checkpoint when the queue is next opened, or marked failed if
+    their kind has no handler. Once a job is done or failed its checkpoints are
+    deleted and cleanups[kind](job_id, params), if given, removes whatever else it
+    left behind.
+    """
+
+    def __init__(self, path, handlers, max_workers=DEFAULT_MAX_WORKERS, cleanups=None):
+        self.path = path
+        self.handlers = handlers
+        self.cleanups = cleanups or {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload-job")
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, name TEXT NOT NULL, kind TEXT NOT NULL, "
+            "params TEXT NOT NULL, status TEXT NOT NULL, total_rows INTEGER, rows_done INTEGER NOT NULL DEFAULT 0, "
+            "chunks_done INTEGER NOT NULL DEFAULT 0, start_rows INTEGER NOT NULL DEFAULT 0, detail TEXT, error TEXT, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_chunks (job_id TEXT NOT NULL, chunk INTEGER NOT NULL, "
+            "payload TEXT NOT NULL, PRIMARY KEY (job_id, chunk))"
+        )
+        self._conn.commit()
+        self._resume_interrupted()
+
+    def _resume_interrupted(self):
+        rows = self._conn.execute("SELECT job_id, kind, params FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                                  ACTIVE_STATUSES).fetchall()
+        for job_id, kind, params in rows:
+            params = json.loads(params)
+            if kind not in self.handlers:
+                self._finish(job_id, kind, params, status=FAILED, error="Interrupted by a restart")
+                continue
+            try:
+                work = self.handlers[kind](params)
+            except Exception as e:
+                # A job that cannot be rebuilt fails on its own instead of keeping the queue from opening
+                self._finish(job_id, kind, params, status=FAILED, error=f"Could not resume after a restart: {e}")
+                continue
+            self._update(job_id, status=QUEUED)
+            self._executor.submit(self._run, job_id, work)
+
+    def _update(self, job_id, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def _finish(self, job_id, kind, params, **fields):
+        fields["finished_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+            # Checkpointed results are only needed while the job can still resume
+            self._conn.execute("DELETE FROM job_chunks WHERE job_id = ?", (job_id,))
+        if kind in self.cleanups:
+            try:
+                self.cleanups[kind](job_id, params)
+            except Exception:
+                pass  # leftovers stay on disk; the job's outcome is already recorded
+
+    def submit(self, name, kind, params, total_rows=None):
+        """Queue a job of a registered kind and return its id"""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler for job kind {kind!r}")
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, name, kind, params, status, total_rows, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, name, kind, json.dumps(params), QUEUED, total_rows, time.time())
+            )
+            self._conn.commit()
+        self._executor.submit(self._run, job_id, self.handlers[kind](params))
+        return job_id
+
+    def _run(self, job_id, work):
+        with self._lock:
+            kind, params, created_at, rows_done, chunks_done = self._conn.execute(
+                "SELECT kind, params, created_at, rows_done, chunks_done FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        self._update(job_id, status=RUNNING, started_at=time.time(), start_rows=rows_done)
+        context = JobContext(self, job_id, json.loads(params), created_at, rows_done, chunks_done)
+        try:
+            detail = work(context)
+        except Exception as e:
+            self._finish(job_id, kind, context.params, status=FAILED, error=str(e))
+            return
+        # A finished job has read every row, so its count replaces the total it was queued with,
+        # which may have been an estimate
+        fields = {"status": DONE, "total_rows": context.rows_done}
+        if detail is not None:
+            fields["detail"] = detail
+        self._finish(job_id, kind, context.params, **fields)
+
+    def _committed_chunks(self, job_id):
+        with self._lock:
+            rows = self._conn.execute("SELECT payload FROM job_chunks WHERE job_id = ? ORDER BY chunk",
+                                      (job_id,)).fetchall()
+        return [json.loads(payload) for payload, in rows]
+
+    def _commit_chunk(self, job_id, chunk, rows_done, payload, detail):
+        with self._lock, self._conn:
+            inserted = self._conn.execute("INSERT OR IGNORE INTO job_chunks (job_id, chunk, payload) VALUES (?, ?, ?)",
+                                          (job_id, chunk, json.dumps(payload))).rowcount
+            if inserted:
+                self._conn.execute("UPDATE jobs SET rows_done = ?, chunks_done = ?, detail = COALESCE(?, detail) "
+                                   "WHERE job_id = ?", (rows_done, chunk + 1, detail, job_id))
+        return bool(inserted)
+
+    @staticmethod
+    def _with_rates(row, now):
+        job = dict(zip(_COLUMNS, row))
+        job["params"] = json.loads(job["params"])
+        elapsed = (job["finished_at"] or now) - job["started_at"] if job["started_at"] else 0.0
+        # Rows carried over from before a resume are not part of this run's throughput
+        job["rows_per_second"] = (job["rows_done"] - job["start_rows"]) / elapsed if elapsed > 0 else 0.0
+        total = job["total_rows"]
+        job["progress"] = min(job["rows_done"] / total, 1.0) if total else (1.0 if job["status"] == DONE else 0.0)
+        remaining = max(total - job["rows_done"], 0) if total else None
+        job["eta_seconds"] = (remaining / job["rows_per_second"]
+                              if job["status"] == RUNNING and remaining is not None and job["rows_per_second"] > 0
+                              else None)
+        return job
+
+    def get(self, job_id):
+        """The job's row plus progress (0-1), rows_per_second and eta_seconds, or None"""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return None if row is None else self._with_rates(row, time.time())
+
+    def recent(self, limit=10):
+        """Latest jobs, newest first, in the same shape as get()"""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs ORDER BY created_at DESC LIMIT ?",
+                                      (limit,)).fetchall()
+        now = time.time()
+        return [self._with_rates(row, now) for row in rows]
@@ -0,0 +1,122 @@
+"""Optional int8 quantized vectors for skills and categories"""
+import numpy as np
+
+from scoring import SCORE_BATCH_SIZE, embed_texts, select_top_k
+
+# Candidates per skill whose approximate int8 scores are replaced by exact float scores
+DEFAULT_RERANK_DEPTH = 8
+
+# Rows dequantized at a time when multiplying; bounds the temporary float32 block
+DEQUANTIZE_BLOCK_ROWS = 8192
+
+# Skills re-ranked at a time; bounds the gathered (rows, rerank_depth, dim) float32
+# block to about 8 MB at the default depth and 1024 dimensions
+RERANK_BLOCK_ROWS = 256
+
+
+class QuantizedVectors:
+    """Row vectors stored as int8 with one float32 scale per row (about 4x smaller than float32)"""
+
+    def __init__(self, codes, scales):
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def from_float(cls, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        scales = np.abs(vectors).max(axis=1) / 127 if len(vectors) else np.empty(0, dtype=np.float32)
+        scales = np.where(scales > 0, scales, 1).astype(np.float32)
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return cls(codes, scales)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.scales.nbytes
+
+    def __matmul__(self, other):
+        """(n, dim) @ (dim, m) computed block by block from the int8 codes"""
+        result = np.empty((len(self), other.shape[1]), dtype=np.float32)
+        for start in range(0, len(self), DEQUANTIZE_BLOCK_ROWS):
+            block = slice(start, start + DEQUANTIZE_BLOCK_ROWS)
+            result[block] = (self.codes[block].astype(np.float32) @ other) * self.scales[block, None]
+        return result
+
+
+class QuantizedCategoryIndex:
+    """Drop-in for CategoryIndex that scores against int8 category vectors.
+
+    Every category gets an approximate score from the int8 codes; the rerank_depth
+    best per skill are then rescored exactly against the float vectors, which (when
+    memory-mapped) are only paged in for those rows.
+    """
+
+    def __init__(self, index, rerank_depth=DEFAULT_RERANK_DEPTH):
+        self.float_index = index
+        self.categories = index.categories
+        self.version = index.version
+        self.revision = index.revision
+        self.fingerprints = index.fingerprints
+        self.quantized = QuantizedVectors.from_float(index.vectors)
+        self.rerank_depth = rerank_depth
+        self.path = None
+
+    @property
+    def dim(self):
+        return self.quantized.shape[1]
+
+    @property
+    def vectors(self):
+        return self.float_index.vectors
+
+    def score_batch(self, skill_descriptions, batch_size=SCORE_BATCH_SIZE):
+        """Return an (n_skills, n_categories) score array; the top rerank_depth per row are exact"""
+        skill_descriptions = list(skill_descriptions)
+        scores = np.empty((len(skill_descriptions), len(self.categories)), dtype=np.float32)
+        for start in range(0, len(skill_descriptions), batch_size):
+            batch = skill_descriptions[start:start + batch_size]
+            skill_vectors = embed_texts(batch, self.dim)
+            approximate = (self.quantized @ skill_vectors.T).T
+
+            candidates, _ = select_top_k(approximate, self.rerank_depth)
+            for row in range(0, len(batch), RERANK_BLOCK_ROWS):
+                rows = slice(row, row + RERANK_BLOCK_ROWS)
+                exact = np.einsum("nd,nkd->nk", skill_vectors[rows], self.float_index.vectors[candidates[rows]])
+                np.put_along_axis(approximate[rows], candidates[rows], exact, axis=1)
+            scores[start:start + len(batch)] = approximate
+        return scores
+
+
+def quantization_report(index, skill_descriptions, rerank_depth=DEFAULT_RERANK_DEPTH, top_k=3):
+    """Compare the int8 scoring path against the float path on sample descriptions.
+
+    Returns top-1 agreement, top-k overlap, mean absolute score error, and the bytes
+    taken by the category vectors and by one skill vector in each representation.
+    """
+    skill_descriptions = list(skill_descriptions)
+    quantized_index = QuantizedCategoryIndex(index, rerank_depth)
+    exact = index.score_batch(skill_descriptions)
+    approximate = quantized_index.score_batch(skill_descriptions)
+    if not len(skill_descriptions):
+        return {"samples": 0}
+
+    k = min(top_k, len(index.categories))
+    exact_top, _ = select_top_k(exact, k)
+    approximate_top, _ = select_top_k(approximate, k)
+    overlap = (exact_top[:, :, None] == approximate_top[:, None, :]).any(axis=2).mean()
+    return {
+        "samples": len(skill_descriptions),
+        "top1_agreement": float((exact_top[:, 0] == approximate_top[:, 0]).mean()),
+        f"top{k}_overlap": float(overlap),
+        "mean_abs_error": float(np.abs(exact - approximate).mean()),
+        "category_bytes_float32": int(np.asarray(index.vectors).nbytes),
+        "category_bytes_int8": int(quantized_index.quantized.nbytes),
+        "skill_vector_bytes_float32": index.dim * 4,
+        "skill_vector_bytes_int8": index.dim + 4
+    }
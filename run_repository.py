@@ -0,0 +1,241 @@
+"""Categorization runs and their history events stored in SQLite and read back through indexed queries"""
+import os
+import sqlite3
+import threading
+
+# Review status of a run, derived from its history events
+PENDING = "pending"
+VALIDATED = "validated"
+CHANGED = "changed"
+
+# History event actions recorded by reviewers; the algorithm's own event has none
+REVIEW_ACTIONS = ("Changed", "Validated")
+
+_COLUMNS = ("seq", "run_id", "timestamp", "input_skill", "skill_description", "recommended_category", "reasoning",
+            "categorization_source", "job_id", "job_chunk", "source_file")
+
+_EVENT_COLUMNS = ("run_id", "ts", "source", "category", "action")
+
+# Run ids per IN (...) query when reading histories
+_SQL_VARIABLES = 500
+
+_INDEXES = {
+    "runs_timestamp": "runs (timestamp)",
+    "runs_category": "runs (recommended_category)",
+    "runs_job": "runs (job_id, job_chunk)",
+    "run_events_run": "run_events (run_id, event_id)",
+    "run_events_ts": "run_events (ts)",
+    "run_events_action": "run_events (action, run_id)"
+}
+
+
+def review_status(history):
+    """CHANGED if a reviewer changed the category, VALIDATED if one only reviewed it, else PENDING"""
+    if any(event.get("action") == "Changed" for event in history):
+        return CHANGED
+    return VALIDATED if any(event.get("action") in REVIEW_ACTIONS for event in history) else PENDING
+
+
+def _event_row(run_id, event):
+    return run_id, event["timestamp"], event["source"], event["category"], event.get("action")
+
+
+def _event(row):
+    ts, source, category, action = row
+    event = {"timestamp": ts, "source": source, "category": category}
+    if action is not None:
+        event["action"] = action
+    return event
+
+
+class RunRepository:
+    """Runs (the dicts shown in Recent History) kept in SQLite tables in WAL mode.
+
+    Runs are numbered by seq in the order they were added and never deleted, so a
+    run's seq - 1 is also its row in RunScores. run_id, timestamp,
+    recommended_category and (job_id, job_chunk) are indexed. A run's history list
+    lives in the append-only run_events table, one typed row per event (run_id, ts,
+    source, category, action) indexed on ts and action, and is put back on the run
+    dicts when they are read, together with the review_status derived from it; the
+    events are the only record of reviews. Safe to share across Streamlit session
+    threads and upload job threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs (seq INTEGER PRIMARY KEY, run_id TEXT NOT NULL UNIQUE, "
+            "timestamp TEXT NOT NULL, input_skill TEXT NOT NULL, skill_description TEXT NOT NULL, "
+            "recommended_category TEXT, reasoning TEXT, categorization_source TEXT, "
+            "job_id TEXT, job_chunk INTEGER, source_file TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS run_events (event_id INTEGER PRIMARY KEY, run_id TEXT NOT NULL, "
+            "ts TEXT NOT NULL, source TEXT NOT NULL, category TEXT NOT NULL, action TEXT)"
+        )
+        for name, table_columns in _INDEXES.items():
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table_columns}")
+        self._conn.commit()
+
+    def _select(self, where="", params=(), order="seq DESC", limit=-1, offset=0):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM runs {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            ).fetchall()
+            runs = [dict(zip(_COLUMNS, row)) for row in rows]
+            histories = {run["run_id"]: [] for run in runs}
+            run_ids = list(histories)
+            for start in range(0, len(run_ids), _SQL_VARIABLES):
+                batch = run_ids[start:start + _SQL_VARIABLES]
+                for run_id, *event in self._conn.execute(
+                        f"SELECT run_id, ts, source, category, action FROM run_events "
+                        f"WHERE run_id IN ({', '.join('?' * len(batch))}) ORDER BY event_id", batch):
+                    histories[run_id].append(_event(event))
+        for run in runs:
+            run["history"] = histories[run["run_id"]]
+            run["review_status"] = review_status(run["history"])
+        return runs
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def append(self, runs, name_run=None, job_chunk=None):
+        """Store new runs after the existing ones.
+
+        name_run(seq) gives each run its run_id, which is set on the dicts too; without
+        it the runs keep their own. job_chunk records which chunk of the runs' job they
+        came from, for has_job().
+        """
+        with self._lock, self._conn:
+            start = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM runs").fetchone()[0] + 1
+            rows, events = [], []
+            for seq, run in enumerate(runs, start=start):
+                if name_run is not None:
+                    run["run_id"] = name_run(seq)
+                rows.append((seq, run["run_id"], run["timestamp"], run["input_skill"], run["skill_description"],
+                             run["recommended_category"], run["reasoning"], run["categorization_source"],
+                             run.get("job_id"), job_chunk, run.get("source_file")))
+                events.extend(_event_row(run["run_id"], event) for event in run["history"])
+            self._conn.executemany(f"INSERT INTO runs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                                   rows)
+            self._conn.executemany(
+                f"INSERT INTO run_events ({', '.join(_EVENT_COLUMNS)}) VALUES ({', '.join('?' * len(_EVENT_COLUMNS))})",
+                events
+            )
+
+    def get(self, run_id):
+        """The run with run_id, or None"""
+        runs = self._select("WHERE run_id = ?", (run_id,))
+        return runs[0] if runs else None
+
+    def has_job(self, job_id, job_chunk=None):
+        """Whether runs from job_id (and, if given, from that chunk of it) are stored"""
+        where, params = ("job_id = ?", (job_id,)) if job_chunk is None else \
+            ("job_id = ? AND job_chunk = ?", (job_id, job_chunk))
+        with self._lock:
+            return self._conn.execute(f"SELECT 1 FROM runs WHERE {where} LIMIT 1", params).fetchone() is not None
+
+    @staticmethod
+    def _filters(run_id=None, search=None):
+        clauses, params = [], []
+        if run_id is not None:
+            clauses.append("run_id = ?")
+            params.append(run_id)
+        if search:
+            # LIKE ignores ASCII case, as the search box always has
+            clauses.append("input_skill LIKE ? ESCAPE '\\'")
+            params.append("%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def page(self, limit, offset=0, run_id=None, search=None):
+        """Newest runs first, optionally only run_id or skills whose name contains search"""
+        where, params = self._filters(run_id, search)
+        return self._select(where, params, limit=limit, offset=offset)
+
+    def count(self, run_id=None, search=None):
+        """Number of runs page() would return without a limit"""
+        where, params = self._filters(run_id, search)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM runs {where}", params).fetchone()[0]
+
+    def run_ids(self, limit):
+        """The latest limit run ids, newest first"""
+        with self._lock:
+            return [run_id for run_id, in self._conn.execute("SELECT run_id FROM runs ORDER BY seq DESC LIMIT ?",
+                                                             (limit,))]
+
+    def descriptions_after(self, seq, limit=None):
+        """(run_id, skill_description) of up to limit runs added after seq, in order"""
+        with self._lock:
+            return self._conn.execute("SELECT run_id, skill_description FROM runs WHERE seq > ? ORDER BY seq LIMIT ?",
+                                      (seq, -1 if limit is None else limit)).fetchall()
+
+    def latest_descriptions(self, limit):
+        """Descriptions of the latest limit runs, oldest first"""
+        with self._lock:
+            rows = self._conn.execute("SELECT skill_description FROM runs ORDER BY seq DESC LIMIT ?", (limit,)).fetchall()
+        return [description for description, in reversed(rows)]
+
+    def update_recommendations(self, updates):
+        """Set (seq, recommended_category, reasoning) on runs still pending review; reviewed runs are left as they are"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"UPDATE runs SET recommended_category = ?, reasoning = ? WHERE seq = ? AND NOT EXISTS "
+                f"(SELECT 1 FROM run_events WHERE run_events.run_id = runs.run_id "
+                f"AND action IN ({', '.join('?' * len(REVIEW_ACTIONS))}))",
+                [(category, reasoning, seq, *REVIEW_ACTIONS) for seq, category, reasoning in updates]
+            )
+
+    def record_review(self, run_id, event, categorization_source):
+        """Append a reviewer's history event to a run and take its category and source"""
+        with self._lock, self._conn:
+            updated = self._conn.execute(
+                "UPDATE runs SET recommended_category = ?, categorization_source = ? WHERE run_id = ?",
+                (event["category"], categorization_source, run_id)
+            ).rowcount
+            if not updated:
+                raise KeyError(run_id)
+            self._conn.execute(
+                f"INSERT INTO run_events ({', '.join(_EVENT_COLUMNS)}) VALUES ({', '.join('?' * len(_EVENT_COLUMNS))})",
+                _event_row(run_id, event)
+            )
+
+    def review_counts(self):
+        """(runs with any reviewer event, runs whose category a reviewer changed), counted from run_events"""
+        with self._lock:
+            reviewed = self._conn.execute(
+                f"SELECT COUNT(DISTINCT run_id) FROM run_events WHERE action IN ({', '.join('?' * len(REVIEW_ACTIONS))})",
+                REVIEW_ACTIONS
+            ).fetchone()[0]
+            changed = self._conn.execute("SELECT COUNT(DISTINCT run_id) FROM run_events WHERE action = 'Changed'"
+                                         ).fetchone()[0]
+        return reviewed, changed
+
+    def category_counts(self):
+        """Runs per recommended category, in category order"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT recommended_category, COUNT(*) FROM runs "
+                                           "GROUP BY recommended_category ORDER BY recommended_category"))
+
+    def accuracy_by_timestamp(self):
+        """(timestamp, runs, runs whose category was not changed) per run timestamp, oldest first"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT timestamp, COUNT(*), SUM(run_id NOT IN (SELECT run_id FROM run_events WHERE action = 'Changed')) "
+                "FROM runs GROUP BY timestamp ORDER BY timestamp"
+            ).fetchall()
+
+    def activity_by_hour(self, actions=REVIEW_ACTIONS):
+        """(hour as 'YYYY-MM-DD HH:00:00', events) for history events with one of actions, oldest first"""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT substr(ts, 1, 13) || ':00:00' AS hour, COUNT(*) FROM run_events "
+                f"WHERE action IN ({', '.join('?' * len(actions))}) GROUP BY hour ORDER BY hour", tuple(actions)
+            ).fetchall()
@@ -0,0 +1,234 @@
+"""Stored per-run category scores that follow taxonomy edits incrementally"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from quantization import QuantizedVectors
+from scoring import SCORE_BATCH_SIZE, embed_texts
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; in-process locking still applies
+    fcntl = None
+
+
+class RunScores:
+    """Score matrix for stored runs, one column per category fingerprint, kept on disk.
+
+    Row i belongs to the run numbered i + 1 in the run repository. Each run's skill
+    vector is kept next to its scores, so when a category is added or edited only
+    that column is recomputed (one matrix-vector product over the stored vectors)
+    and unchanged columns are carried over as they are. The category vectors behind
+    the current columns are kept too, so new runs can be scored by a thread that has
+    no category index of its own, such as an upload job.
+
+    Vectors and scores live in raw files under path that new runs are appended to,
+    and are memory-mapped on open, so a restart only embeds runs added since the
+    last save. meta.json records how many rows are complete and which generation of
+    score and column files holds the current columns, and is replaced last; rows past that count, left by
+    an interrupted write, are cut off when the store is next opened.
+
+    Replicas may share path: every change takes an exclusive lock on its lock file
+    and first re-reads meta.json, so rows and columns written by another process
+    are picked up instead of overwritten.
+
+    With quantized=True the skill vectors are kept as int8 with per-row scales,
+    about a quarter of the float32 size; recomputed columns are then approximate.
+    """
+
+    def __init__(self, dim, path, quantized=False):
+        self.dim = dim
+        self.path = path
+        self.quantized = quantized
+        self.categories = []
+        self.fingerprints = []
+        self.category_vectors = np.zeros((0, dim), dtype=np.float32)
+        self._rows = 0
+        # Bumped whenever the score columns change; names the file holding them
+        self._generation = 0
+        # Held by callers around sync/add_runs; the store is shared by all sessions
+        self.lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+        with self._locked():
+            pass
+
+    @contextmanager
+    def _locked(self):
+        # Serialise changes across replicas, starting from what the others have saved
+        with open(self._file("lock"), "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._load()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        """Read meta.json and cut the files back to the rows it counts as complete"""
+        try:
+            with open(self._file("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = None
+        if meta is not None and (meta["dim"], meta["quantized"]) == (self.dim, self.quantized):
+            if meta["generation"] != self._generation or not len(self.category_vectors):
+                self._generation = meta["generation"]
+                self.category_vectors = (np.load(self._file(self._columns_name())) if meta["categories"]
+                                         else np.zeros((0, self.dim), dtype=np.float32))
+            self._rows = meta["rows"]
+            self.categories = meta["categories"]
+            self.fingerprints = meta["fingerprints"]
+        else:
+            self._rows, self._generation = 0, 0
+            self.categories, self.fingerprints = [], []
+            self.category_vectors = np.zeros((0, self.dim), dtype=np.float32)
+        # Only rows present in every file count, should one have been lost
+        for name, width, dtype in self._layout():
+            row_bytes = width * np.dtype(dtype).itemsize
+            if row_bytes:
+                size = os.path.getsize(self._file(name)) if os.path.exists(self._file(name)) else 0
+                self._rows = min(self._rows, size // row_bytes)
+        for name, width, dtype in self._layout():
+            self._truncate(name, self._rows * width * np.dtype(dtype).itemsize)
+        self._map()
+
+    def __len__(self):
+        return self._rows
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _layout(self):
+        """(file name, values per row, dtype) of each per-row file"""
+        vectors = ([("codes.bin", self.dim, np.int8), ("scales.bin", 1, np.float32)] if self.quantized
+                   else [("vectors.bin", self.dim, np.float32)])
+        return vectors + [(self._scores_name(), len(self.categories), np.float32)]
+
+    def _scores_name(self):
+        return f"scores-{self._generation}.bin"
+
+    def _columns_name(self):
+        return f"columns-{self._generation}.npy"
+
+    def _truncate(self, name, size):
+        with open(self._file(name), "ab") as f:
+            if f.tell() != size:
+                f.truncate(size)
+
+    def _read(self, name, width, dtype):
+        if not self._rows or not width:
+            return np.zeros((self._rows, width), dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode="r", shape=(self._rows, width))
+
+    def _map(self):
+        arrays = [self._read(name, width, dtype) for name, width, dtype in self._layout()]
+        if self.quantized:
+            codes, scales, self.scores = arrays
+            self.vectors = QuantizedVectors(codes, scales[:, 0])
+        else:
+            self.vectors, self.scores = arrays
+
+    def _save_meta(self):
+        tmp = self._file(f"meta.json.tmp-{os.getpid()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "quantized": self.quantized, "rows": self._rows, "generation": self._generation,
+                       "categories": self.categories, "fingerprints": self.fingerprints}, f)
+        os.replace(tmp, self._file("meta.json"))
+
+    def reset(self):
+        """Drop every stored row, e.g. when the run repository was recreated"""
+        with self._locked():
+            self._rows = 0
+            for name, _, _ in self._layout():
+                self._truncate(name, 0)
+            self._save_meta()
+            self._map()
+
+    def add_runs(self, skill_descriptions, batch_size=SCORE_BATCH_SIZE, first_row=None):
+        """Embed and score new runs against the columns currently held, appending them to the files.
+
+        first_row is the row the first description belongs at, as the caller last saw
+        len(self); descriptions another replica has stored since are skipped.
+        """
+        with self._locked():
+            skill_descriptions = list(skill_descriptions)
+            if first_row is not None:
+                if self._rows < first_row:
+                    return  # reset meanwhile; the caller starts again from len(self)
+                skill_descriptions = skill_descriptions[self._rows - first_row:]
+            category_vectors = np.ascontiguousarray(self.category_vectors.T)
+            # Embedded a batch at a time, so a large backlog never needs all its vectors in memory
+            for start in range(0, len(skill_descriptions), batch_size):
+                vectors = embed_texts(skill_descriptions[start:start + batch_size], self.dim)
+                scores = vectors @ category_vectors
+                if self.quantized:
+                    quantized = QuantizedVectors.from_float(vectors)
+                    rows = [quantized.codes, quantized.scales[:, None], scores]
+                else:
+                    rows = [vectors, scores]
+                for (name, _, dtype), values in zip(self._layout(), rows):
+                    with open(self._file(name), "ab") as f:
+                        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+            self._rows += len(skill_descriptions)
+            self._save_meta()
+            self._map()
+
+    def sync(self, index):
+        """Align columns with index, recomputing only new or edited categories.
+
+        Returns (rows, best_columns): positions of runs whose best category may have
+        changed, and their new argmax column in index.categories order.
+        """
+        with self._locked():
+            if self.fingerprints == index.fingerprints and self.categories == index.categories:
+                return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+            carried = {(category, fingerprint): column
+                       for column, (category, fingerprint) in enumerate(zip(self.categories, self.fingerprints))}
+            scores = np.empty((len(self), len(index.categories)), dtype=np.float32)
+            changed = []
+            for column, key in enumerate(zip(index.categories, index.fingerprints)):
+                if key in carried:
+                    scores[:, column] = self.scores[:, carried[key]]
+                else:
+                    changed.append(column)
+            if changed and len(self):
+                scores[:, changed] = self.vectors @ np.ascontiguousarray(index.vectors[changed].T)
+
+            # A run's argmax can only move if its old best column was edited or removed,
+            # or if a recomputed column now beats the old best score
+            if self.categories and len(self):
+                current = set(zip(index.categories, index.fingerprints))
+                survivors = np.array([key in current for key in zip(self.categories, self.fingerprints)])
+                old_best = self.scores.argmax(axis=1)
+                old_best_score = self.scores[np.arange(len(self)), old_best]
+                affected = ~survivors[old_best]
+                if changed:
+                    affected |= (scores[:, changed] > old_best_score[:, None]).any(axis=1)
+                rows = np.flatnonzero(affected)
+            else:
+                rows = np.arange(len(self))
+
+            # New columns go to new files, which the metadata starts naming only once they are complete
+            previous = [self._scores_name(), self._columns_name()]
+            self._generation += 1
+            with open(self._file(self._scores_name()), "wb") as f:
+                f.write(scores.tobytes())
+            self.category_vectors = np.asarray(index.vectors, dtype=np.float32).copy()
+            np.save(self._file(self._columns_name()), self.category_vectors)
+            self.categories = list(index.categories)
+            self.fingerprints = list(index.fingerprints)
+            self._save_meta()
+            self._map()
+            for name in previous:
+                if os.path.exists(self._file(name)):
+                    os.remove(self._file(name))
+            if not self.categories:
+                return rows, np.zeros(len(rows), dtype=np.intp)
+            return rows, scores[rows].argmax(axis=1)
@@ -0,0 +1,138 @@
+"""Two-tier memoization of category match scores: in-process LRU over a SQLite table"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# Entries kept in the in-process tier before the least recently used is evicted
+DEFAULT_MEMORY_ENTRIES = 1024
+
+# Keys per SQL statement in get_many / put_many
+BULK_BATCH_SIZE = 500
+
+# Rows kept in the SQLite tier; entries from superseded taxonomy versions are never
+# read again, so the oldest writes are dropped past this
+DEFAULT_MAX_ROWS = 200000
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_description(description):
+    """Fold case, Unicode forms and whitespace so trivially different descriptions share a key"""
+    if not isinstance(description, str):
+        return ""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", description)).strip().lower()
+
+
+def cache_key(description, version):
+    """Hash of the normalized description and the taxonomy version it was scored under"""
+    payload = f"{version}\0{normalize_description(description)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """Memoizes JSON-serialisable results by key.
+
+    Lookups try a bounded in-process LRU first, then a SQLite table that survives
+    restarts; disk hits are promoted into memory. The table keeps the max_rows most
+    recently written entries. Safe to share across Streamlit session threads.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MEMORY_ENTRIES, max_rows=DEFAULT_MAX_ROWS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _trim(self):
+        # INSERT OR REPLACE gives each write the next rowid, so the lowest rowids are the oldest writes
+        self._conn.execute("DELETE FROM scores WHERE rowid <= (SELECT MAX(rowid) FROM scores) - ?",
+                           (self.max_rows,))
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return self._memory[key]
+
+            row = self._conn.execute("SELECT value FROM scores WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            value = json.loads(row[0])
+            self._remember(key, value)
+            self._stats["disk_hits"] += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock, self._conn:
+            self._remember(key, value)
+            self._conn.execute("INSERT OR REPLACE INTO scores (key, value) VALUES (?, ?)",
+                               (key, json.dumps(value)))
+            self._trim()
+
+    def get_many(self, keys):
+        """Return {key: value} for those of keys that are cached, reading the SQLite tier in batches.
+
+        Bulk lookups do not promote disk hits into the in-process tier, so one large
+        upload cannot flush it.
+        """
+        found = {}
+        with self._lock:
+            missing = [key for key in keys if key not in self._memory]
+            found.update((key, self._memory[key]) for key in keys if key in self._memory)
+            memory_hits = len(found)
+            for start in range(0, len(missing), BULK_BATCH_SIZE):
+                batch = missing[start:start + BULK_BATCH_SIZE]
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM scores WHERE key IN ({', '.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update((key, json.loads(value)) for key, value in rows)
+            self._stats["memory_hits"] += memory_hits
+            self._stats["disk_hits"] += len(found) - memory_hits
+            self._stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store several (key, value) pairs in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO scores (key, value) VALUES (?, ?)",
+                                   ((key, json.dumps(value)) for key, value in items))
+            self._trim()
+
+    def get_or_compute(self, description, version, compute):
+        """Return the cached result for description under version, calling compute(description) on a miss"""
+        key = cache_key(description, version)
+        value = self.get(key)
+        if value is None:
+            value = compute(description)
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        """Hit/miss counters plus the current size of the in-process tier"""
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            lookups = hits + self._stats["misses"]
+            return dict(self._stats, memory_entries=len(self._memory),
+                        hit_rate=hits / lookups if lookups else 0.0)
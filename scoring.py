@@ -0,0 +1,403 @@
+"""Vector scoring engine that matches skill descriptions against the category taxonomy"""
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; in-process locking still applies
+    fcntl = None
+
+# Width of the hashed term space shared by skill and category vectors
+VECTOR_DIM = 1024
+
+# Rows embedded per matrix product; bounds the dense (rows, VECTOR_DIM) buffer
+SCORE_BATCH_SIZE = 4096
+
+# Rows handed to a worker process at a time when scoring in parallel
+PARALLEL_CHUNK_SIZE = 20000
+
+# Below this many rows, starting a process pool costs more than it saves
+PARALLEL_MIN_ROWS = 50000
+
+# Bump when the embedding scheme or index layout changes so stale files are never reused
+INDEX_FORMAT_VERSION = 2
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+_STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "both", "by", "for", "from", "in",
+    "including", "includes", "into", "is", "it", "key", "of", "on", "or", "skills",
+    "the", "to", "using", "with", "years", "experience",
+})
+
+
+def _stem(term):
+    # Fold simple plurals so "schemas" and "schema" share a bucket
+    if len(term) > 4 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def tokenize(text):
+    """Split a description into lowercase terms, dropping stop words"""
+    if not isinstance(text, str):
+        return []
+    return [_stem(term) for term in _TOKEN_PATTERN.findall(text.lower()) if term not in _STOP_WORDS]
+
+
+@lru_cache(maxsize=1 << 16)
+def _term_bucket(term, dim):
+    # crc32 rather than hash() so buckets agree across processes and restarts
+    return zlib.crc32(term.encode("utf-8")) % dim
+
+
+def embed_texts(texts, dim=VECTOR_DIM):
+    """Return an L2-normalised (len(texts), dim) float32 matrix of hashed term vectors"""
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        for term in tokenize(text):
+            rows.append(row)
+            cols.append(_term_bucket(term, dim))
+
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    if rows:
+        np.add.at(vectors, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+
+    # Dampen repeated terms, then normalise so a dot product is a cosine similarity
+    np.log1p(vectors, out=vectors)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def taxonomy_version(descriptions, dim=VECTOR_DIM):
+    """Return a short fingerprint of a {category: description} taxonomy and embedding scheme"""
+    payload = json.dumps({
+        "format": INDEX_FORMAT_VERSION,
+        "dim": dim,
+        "categories": [[category, descriptions[category]] for category in descriptions]
+    })
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def category_fingerprints(descriptions, dim=VECTOR_DIM):
+    """Return one short fingerprint per category; it changes only when that category's vector would"""
+    return [
+        hashlib.sha256(json.dumps([INDEX_FORMAT_VERSION, dim, category, descriptions[category]]).encode("utf-8")).hexdigest()[:16]
+        for category in descriptions
+    ]
+
+
+class CategoryIndex:
+    """Precomputed category vectors that score whole batches of skills in one matrix product"""
+
+    def __init__(self, categories, vectors, version=None, path=None, fingerprints=None, revision=0, counts=None,
+                 sums=None):
+        self.categories = list(categories)
+        self.vectors = vectors
+        self.version = version
+        # Set when vectors are memory-mapped from an index file on disk
+        self.path = path
+        # Per-category fingerprints, parallel to categories, for incremental re-scoring
+        self.fingerprints = list(fingerprints) if fingerprints is not None else [None] * len(self.categories)
+        # Bumped by every reviewer correction folded into the vectors (see apply_correction)
+        self.revision = revision
+        # Examples averaged into each category vector so far; the description counts as one
+        self.counts = list(counts) if counts is not None else [1] * len(self.categories)
+        # Unnormalised sum of those examples per category; vectors are these sums normalised.
+        # None until the first correction, when each sum is just the description vector
+        self.sums = sums
+
+    @classmethod
+    def from_descriptions(cls, descriptions, dim=VECTOR_DIM):
+        """Build the index from a {category: description} mapping such as CATEGORY_DESCRIPTIONS"""
+        categories = list(descriptions)
+        texts = [f"{category} {descriptions[category]}" for category in categories]
+        return cls(categories, embed_texts(texts, dim), version=taxonomy_version(descriptions, dim),
+                   fingerprints=category_fingerprints(descriptions, dim))
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    def score_batch(self, skill_descriptions, batch_size=SCORE_BATCH_SIZE):
+        """Return an (n_skills, n_categories) array of cosine similarity scores"""
+        skill_descriptions = list(skill_descriptions)
+        scores = np.empty((len(skill_descriptions), len(self.categories)), dtype=np.float32)
+        for start in range(0, len(skill_descriptions), batch_size):
+            batch = skill_descriptions[start:start + batch_size]
+            scores[start:start + len(batch)] = embed_texts(batch, self.dim) @ self.vectors.T
+        return scores
+
+
+def _index_path(index_dir, version):
+    return os.path.join(index_dir, f"category_index-{version}")
+
+
+def _revision_file(path, revision, kind):
+    return f"{path}.r{revision}.{kind}.npy"
+
+
+def save_index(index, index_dir):
+    """Write the index as revision-named .npy matrices plus .json metadata; returns the path prefix.
+
+    Each revision's vectors (and correction sums) go to files of their own, and the
+    metadata naming them is renamed into place last, so a reader that opens the
+    metadata always finds the vectors written with it. Files more than one revision
+    old are removed afterwards; readers that mapped them keep their mapping.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    path = _index_path(index_dir, index.version)
+    tmp_suffix = f".tmp-{os.getpid()}"
+
+    files = {"vectors": _revision_file(path, index.revision, "vectors")}
+    matrices = {"vectors": index.vectors}
+    if index.sums is not None:
+        files["sums"] = _revision_file(path, index.revision, "sums")
+        matrices["sums"] = index.sums
+    for kind, file in files.items():
+        with open(file + tmp_suffix, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrices[kind], dtype=np.float32))
+        os.replace(file + tmp_suffix, file)
+
+    with open(path + ".json" + tmp_suffix, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": index.version,
+            "format": INDEX_FORMAT_VERSION,
+            "dim": index.dim,
+            "categories": index.categories,
+            "fingerprints": index.fingerprints,
+            "revision": index.revision,
+            "counts": index.counts,
+            "vectors": os.path.basename(files["vectors"]),
+            "sums": os.path.basename(files["sums"]) if "sums" in files else None
+        }, f)
+    os.replace(path + ".json" + tmp_suffix, path + ".json")
+
+    for old_revision in range(max(index.revision - 1, 0)):
+        for kind in ("vectors", "sums"):
+            try:
+                os.remove(_revision_file(path, old_revision, kind))
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def load_index(path):
+    """Open a saved index read-only; vectors are a numpy.memmap shared through the page cache"""
+    with open(path + ".json", encoding="utf-8") as f:
+        meta = json.load(f)
+    index_dir = os.path.dirname(path)
+    vectors = np.load(os.path.join(index_dir, meta["vectors"]), mmap_mode="r")
+    if vectors.shape != (len(meta["categories"]), meta["dim"]):
+        raise ValueError(f"index {path} revision {meta['revision']}: vectors of shape {vectors.shape} "
+                         f"do not match {len(meta['categories'])} categories of dim {meta['dim']}")
+    sums = np.load(os.path.join(index_dir, meta["sums"]), mmap_mode="r") if meta["sums"] else None
+    return CategoryIndex(meta["categories"], vectors, version=meta["version"], path=path,
+                         fingerprints=meta["fingerprints"], revision=meta["revision"],
+                         counts=meta["counts"], sums=sums)
+
+
+def load_or_build_index(descriptions, index_dir, dim=VECTOR_DIM):
+    """Memory-map the index for this taxonomy version, building and saving it on first use"""
+    path = _index_path(index_dir, taxonomy_version(descriptions, dim))
+    if not os.path.exists(path + ".json"):
+        path = save_index(CategoryIndex.from_descriptions(descriptions, dim), index_dir)
+    return load_index(path)
+
+
+def index_stamp(index_dir, version):
+    """Cheap change marker for a saved index: its metadata mtime, or None before it is built"""
+    try:
+        return os.stat(_index_path(index_dir, version) + ".json").st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def _locked_index(path):
+    # Serialise read-modify-write of an index file across threads and processes
+    with _write_lock, open(path + ".lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def apply_correction(index_dir, version, category, skill_description):
+    """Fold a reviewer-corrected skill into its category vector and publish a new revision.
+
+    The skill vector is added to the category's unnormalised sum of examples and the
+    category vector becomes that sum normalised, i.e. the direction of their mean, so
+    no offline retrain is needed. The updated index replaces
+    the saved one atomically; sessions pick it up through index_stamp. Returns the
+    new CategoryIndex, or None if category is not in the index.
+    """
+    path = _index_path(index_dir, version)
+    with _locked_index(path):
+        index = load_index(path)
+        if category not in index.categories:
+            return None
+        column = index.categories.index(category)
+        skill_vector = embed_texts([skill_description], index.dim)[0]
+        if not skill_vector.any():
+            return index
+
+        vectors = np.array(index.vectors)
+        sums = np.array(index.sums if index.sums is not None else index.vectors)
+        counts = list(index.counts)
+        sums[column] += skill_vector
+        vectors[column] = sums[column] / np.linalg.norm(sums[column])
+        counts[column] += 1
+
+        fingerprints = list(index.fingerprints)
+        fingerprints[column] = hashlib.sha256(
+            f"{fingerprints[column]}:{hashlib.sha256(skill_vector.tobytes()).hexdigest()}".encode("utf-8")
+        ).hexdigest()[:16]
+
+        updated = CategoryIndex(index.categories, vectors, version=index.version, fingerprints=fingerprints,
+                                revision=index.revision + 1, counts=counts, sums=sums)
+        return load_index(save_index(updated, index_dir))
+
+
+def available_cpus():
+    """Number of cores this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Index held by each worker process, installed once by _init_worker
+_worker_index = None
+
+
+def _init_worker(index_path, index):
+    global _worker_index
+    _worker_index = load_index(index_path) if index_path is not None else index
+
+
+def _score_chunk(skill_descriptions):
+    return _worker_index.score_batch(skill_descriptions)
+
+
+def _worker_initargs(index):
+    if index.path is not None:
+        return (index.path, None)
+    return (None, index)
+
+
+# The worker pool kept for the index last scored in parallel, as (key, pool)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _scoring_pool(index, workers):
+    """Long-lived spawn pool whose workers hold index; replaces the pool of an earlier index"""
+    global _pool
+    key = (type(index).__name__, index.version, index.revision, index.path, workers)
+    with _pool_lock:
+        if _pool is not None and _pool[0] == key:
+            return _pool[1]
+        if _pool is not None:
+            # Chunks already handed to the old workers still finish
+            _pool[1].shutdown(wait=False)
+        # spawn, not fork: the Streamlit server process is multi-threaded
+        pool = ProcessPoolExecutor(max_workers=workers,
+                                   mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker,
+                                   initargs=_worker_initargs(index))
+        _pool = (key, pool)
+        return pool
+
+
+def score_parallel(index, skill_descriptions, max_workers=None, chunk_size=PARALLEL_CHUNK_SIZE):
+    """Score descriptions in chunks across a process pool sized to the available cores.
+
+    The pool outlives the call and is reused until the index changes, so workers are
+    spawned and receive the category matrix (as a file path when the index is
+    memory-mapped) once, and only the description chunks are pickled per call.
+    Small inputs are scored inline.
+    """
+    skill_descriptions = list(skill_descriptions)
+    chunks = [skill_descriptions[start:start + chunk_size]
+              for start in range(0, len(skill_descriptions), chunk_size)]
+    workers = min(max_workers or available_cpus(), len(chunks))
+    if workers < 2 or len(skill_descriptions) < PARALLEL_MIN_ROWS:
+        return index.score_batch(skill_descriptions)
+
+    pool = _scoring_pool(index, max_workers or available_cpus())
+    return np.vstack(list(pool.map(_score_chunk, chunks)))
+
+
+def select_top_k(scores, k, exclude=None):
+    """Return (indices, scores) of the k best categories per row of a score array, best first.
+
+    Selection uses argpartition, so each row costs O(n_categories) plus O(k log k) to
+    order the winners, instead of a full sort. exclude optionally gives one column per
+    row (-1 for none) to leave out, e.g. the skill's current category; excluded columns
+    score -inf and only surface when k covers every category.
+    """
+    scores = np.atleast_2d(np.asarray(scores, dtype=np.float32))
+    n_rows, n_categories = scores.shape
+    k = min(k, n_categories)
+    if exclude is not None:
+        exclude = np.asarray(exclude).reshape(-1)
+        rows = np.flatnonzero(exclude >= 0)
+        scores = scores.copy()
+        scores[rows, exclude[rows]] = -np.inf
+    if k == 0:
+        return np.empty((n_rows, 0), dtype=np.intp), np.empty((n_rows, 0), dtype=np.float32)
+
+    if k < n_categories:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n_categories), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+
+def categorize_batch(index, skill_descriptions, top_k=3, max_workers=None):
+    """Categorize a pandas Series of descriptions in one pass.
+
+    Returns a DataFrame aligned with the Series index holding recommended_category,
+    match_score, reasoning and the top_k next-best categories in alternatives.
+    Large inputs are scored across worker processes (see score_parallel).
+    """
+    scores = score_parallel(index, skill_descriptions.tolist(), max_workers=max_workers)
+    categories = np.asarray(index.categories, dtype=object)
+    ranked, ranked_scores = select_top_k(scores, top_k + 1)
+    best_scores = ranked_scores[:, 0]
+
+    matched = best_scores > 0
+    recommended = np.where(matched, categories[ranked[:, 0]], "Uncategorized")
+    reasoning = np.where(
+        matched,
+        "Strongest overlap with the " + recommended + " category description (score "
+        + np.char.mod("%.2f", best_scores).astype(object) + ").",
+        "No overlap with any category description."
+    )
+
+    return pd.DataFrame({
+        "recommended_category": recommended,
+        "match_score": best_scores,
+        "reasoning": reasoning,
+        "alternatives": categories[ranked[:, 1:]].tolist()
+    }, index=skill_descriptions.index)
@@ -0,0 +1,188 @@
+"""Micro-batching asyncio service that funnels categorization requests to a model backend"""
+import asyncio
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Descriptions collected before a batch is dispatched; a single larger request goes as it is
+DEFAULT_MAX_BATCH_SIZE = 64
+
+# Longest a request waits for others to join its batch
+DEFAULT_MAX_WAIT_MS = 10
+
+# Recent requests and batches kept for the latency and batch-size metrics
+METRICS_WINDOW = 10000
+
+# Request kinds and the backend method each calls
+CATEGORIZE = "categorize"
+SCORE = "score"
+
+
+class LocalModelBackend:
+    """In-process stand-in for a real model.
+
+    categorize(descriptions Series) returns a results DataFrame like
+    scoring.categorize_batch, and score(descriptions) an (n, n_categories) array;
+    both run on a worker thread. Any object with async categorize(descriptions) ->
+    list of result dicts and async score(descriptions) -> sequence of score rows can
+    be used as a backend instead.
+    """
+
+    def __init__(self, categorize, score):
+        self._categorize = categorize
+        self._score = score
+
+    async def categorize(self, descriptions):
+        # Scoring is CPU-bound; keep it off the event loop so batching continues meanwhile
+        results = await asyncio.to_thread(self._categorize, pd.Series(descriptions))
+        return results.to_dict("records")
+
+    async def score(self, descriptions):
+        return await asyncio.to_thread(self._score, list(descriptions))
+
+
+class ScoringService:
+    """Collects concurrent requests from every session into micro-batches.
+
+    Each request names its backend, so one long-lived service serves every taxonomy
+    revision: requests are batched per (kind, backend) and a backend replaced after a
+    taxonomy edit simply stops receiving requests. A batch is dispatched once it holds
+    max_batch_size descriptions or its first request has waited max_wait_ms. The event
+    loop runs on a daemon thread until close(), so Streamlit script threads and upload
+    job threads call categorize() and score() synchronously and block only on their
+    own result.
+    """
+
+    def __init__(self, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.latencies_ms = deque(maxlen=METRICS_WINDOW)
+        self.batch_sizes = deque(maxlen=METRICS_WINDOW)
+        # Running totals; the windows above only cover the latest METRICS_WINDOW entries
+        self.total_requests = 0
+        self.total_batches = 0
+        self._metrics_lock = threading.Lock()
+
+        self._loop = asyncio.new_event_loop()
+        self._queue = None
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="scoring-service", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        dispatcher = self._loop.create_task(self._dispatch_batches())
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
+        dispatcher.cancel()
+        self._loop.run_until_complete(asyncio.gather(dispatcher, return_exceptions=True))
+        self._loop.close()
+
+    def close(self):
+        """Stop the event loop and wait for its thread to exit"""
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        size = len(batch[0][2])
+        deadline = self._loop.time() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+            size += len(batch[-1][2])
+        return batch
+
+    async def _dispatch_batches(self):
+        while True:
+            groups = {}
+            for request in await self._next_batch():
+                kind, backend = request[:2]
+                groups.setdefault((kind, id(backend)), []).append(request)
+            with self._metrics_lock:
+                for requests in groups.values():
+                    self.batch_sizes.append(sum(len(descriptions) for _, _, descriptions, _, _ in requests))
+                self.total_batches += len(groups)
+            # Run the backend calls as their own tasks so the next batch can start forming
+            for requests in groups.values():
+                self._loop.create_task(self._run_batch(requests))
+
+    async def _run_batch(self, requests):
+        kind, backend = requests[0][:2]
+        descriptions = [description for _, _, batch, _, _ in requests for description in batch]
+        try:
+            results = await getattr(backend, kind)(descriptions)
+        except Exception as e:
+            for _, _, _, future, _ in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finished = time.perf_counter()
+        with self._metrics_lock:
+            self.latencies_ms.extend((finished - submitted) * 1000 for _, _, _, _, submitted in requests)
+        start = 0
+        for _, _, batch, future, _ in requests:
+            if not future.done():
+                future.set_result(results[start:start + len(batch)])
+            start += len(batch)
+
+    async def submit(self, kind, backend, descriptions):
+        """Queue one request for several descriptions and wait for their results, in order"""
+        future = self._loop.create_future()
+        with self._metrics_lock:
+            self.total_requests += 1
+        await self._queue.put((kind, backend, list(descriptions), future, time.perf_counter()))
+        return await future
+
+    def _call(self, kind, backend, descriptions, timeout):
+        return asyncio.run_coroutine_threadsafe(self.submit(kind, backend, descriptions), self._loop).result(timeout)
+
+    def categorize(self, description, backend, timeout=None):
+        """Blocking call for script threads; returns the backend's result dict"""
+        return self._call(CATEGORIZE, backend, [description], timeout)[0]
+
+    def categorize_many(self, descriptions, backend, timeout=None):
+        """Categorize descriptions as one request and return their result dicts, in order"""
+        descriptions = list(descriptions)
+        return self._call(CATEGORIZE, backend, descriptions, timeout) if descriptions else []
+
+    def score(self, description, backend, timeout=None):
+        """Blocking call for script threads; returns the description's score per category"""
+        return self._call(SCORE, backend, [description], timeout)[0]
+
+    def score_many(self, descriptions, backend, timeout=None):
+        """Score descriptions as one request; returns an (n, n_categories) array"""
+        descriptions = list(descriptions)
+        if not descriptions:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.asarray(self._call(SCORE, backend, descriptions, timeout))
+
+    def stats(self):
+        """Request count, latency percentiles in milliseconds and batch-size figures"""
+        with self._metrics_lock:
+            latencies = np.array(self.latencies_ms, dtype=np.float64)
+            batch_sizes = np.array(self.batch_sizes, dtype=np.float64)
+            requests, batches = self.total_requests, self.total_batches
+        if not len(latencies):
+            return {"requests": requests, "batches": batches, "p50_ms": 0.0, "p95_ms": 0.0,
+                    "mean_batch_size": 0.0, "max_batch_size": 0}
+        return {
+            "requests": requests,
+            "batches": batches,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "mean_batch_size": float(batch_sizes.mean()),
+            "max_batch_size": int(batch_sizes.max())
+        }
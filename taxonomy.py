@@ -0,0 +1,172 @@
+"""Hierarchical category taxonomy scored top-down with beam search"""
+import numpy as np
+import pandas as pd
+
+from scoring import SCORE_BATCH_SIZE, embed_texts, select_top_k
+
+# Branches kept open at each level of the descent
+DEFAULT_BEAM_WIDTH = 3
+
+PATH_SEPARATOR = " › "
+
+# Skills per gathered (skills, candidates, dim) block; bounds memory during the descent
+GATHER_BLOCK_ROWS = 256
+
+
+class TaxonomyTree:
+    """Category tree whose leaves are the columns of a CategoryIndex.
+
+    Each internal node is represented by the normalised sum of its leaf vectors, so a
+    skill can be scored against parents first and only descend into the beam_width
+    most promising branches. Per-skill cost grows with depth * beam * fan-out, i.e.
+    roughly log(categories) for a balanced tree, instead of the number of leaves.
+    """
+
+    def __init__(self, names, parents, children, vectors, depth):
+        self.names = names
+        self.parents = parents
+        # (n_nodes, max_fanout) child ids padded with -1; a leaf's only child is itself
+        self.children = children
+        self.vectors = vectors
+        self.depth = depth
+        self.root = len(names) - 1
+        self._node_ids = {name: node for node, name in enumerate(names)}
+        self.paths = [PATH_SEPARATOR.join(self.path(name)) for name in names]
+
+    @classmethod
+    def build(cls, tree, index):
+        """Build from {parent: [children]} over the leaves of index.
+
+        Children may be leaf categories or other parents. Leaves that appear under no
+        parent hang directly off the root.
+        """
+        leaves = list(index.categories)
+        internal = [name for name in tree if name not in set(leaves)]
+        names = leaves + internal + [""]  # synthetic root last
+        node_ids = {name: node for node, name in enumerate(names)}
+        root = len(names) - 1
+
+        parents = np.full(len(names), root, dtype=np.intp)
+        parents[root] = -1
+        for parent, kids in tree.items():
+            for kid in kids:
+                if kid not in node_ids:
+                    raise ValueError(f"Unknown category {kid!r} under {parent!r}")
+                parents[node_ids[kid]] = node_ids[parent]
+
+        child_lists = [[] for _ in names]
+        for node, parent in enumerate(parents):
+            if parent >= 0:
+                child_lists[parent].append(node)
+        for leaf in range(len(leaves)):
+            child_lists[leaf] = [leaf]
+
+        depths = np.zeros(len(names), dtype=np.intp)
+        for node in range(len(names)):
+            parent = parents[node]
+            while parent >= 0:
+                depths[node] += 1
+                parent = parents[parent]
+
+        # Internal vectors are accumulated bottom-up from the leaves
+        vectors = np.zeros((len(names), index.dim), dtype=np.float32)
+        vectors[:len(leaves)] = index.vectors
+        for node in sorted(range(len(leaves), len(names)), key=lambda n: -depths[n]):
+            vectors[node] = vectors[child_lists[node]].sum(axis=0)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+        fanout = max(len(kids) for kids in child_lists)
+        children = np.full((len(names), fanout), -1, dtype=np.intp)
+        for node, kids in enumerate(child_lists):
+            children[node, :len(kids)] = kids
+        return cls(names, parents, children, vectors, int(depths.max()))
+
+    def path(self, category):
+        """Names from the top-level category down to category; [category] if it is not in the tree"""
+        node = self._node_ids.get(category)
+        if node is None:
+            return [category]
+        path = []
+        while node != self.root:
+            path.append(self.names[node])
+            node = self.parents[node]
+        return path[::-1]
+
+    def _score_candidates(self, skill_vectors, candidates):
+        nodes, positions = np.unique(candidates, return_inverse=True)
+        if len(nodes) <= 4 * candidates.shape[1]:
+            # Skills share most branches: score each distinct node once for the batch
+            node_scores = skill_vectors @ self.vectors[nodes].T
+            return np.take_along_axis(node_scores, positions.reshape(candidates.shape), axis=1)
+
+        # Skills spread across the tree: score only each skill's own candidates
+        scores = np.empty(candidates.shape, dtype=np.float32)
+        for start in range(0, len(candidates), GATHER_BLOCK_ROWS):
+            block = slice(start, start + GATHER_BLOCK_ROWS)
+            scores[block] = np.matmul(self.vectors[candidates[block]], skill_vectors[block, :, None])[..., 0]
+        return scores
+
+    def beam_search(self, skill_vectors, beam_width=DEFAULT_BEAM_WIDTH):
+        """Descend the tree for each skill vector.
+
+        Returns (leaf node ids, scores), each (n_skills, beam_width) and best first;
+        slots the tree could not fill hold -1 and -inf.
+        """
+        n_skills = len(skill_vectors)
+        frontier = np.full((n_skills, 1), self.root, dtype=np.intp)
+        frontier_scores = np.zeros((n_skills, 1), dtype=np.float32)
+        for _ in range(self.depth):
+            candidates = self.children[frontier.clip(min=0)].reshape(n_skills, -1)
+            valid = (candidates >= 0) & np.repeat(frontier >= 0, self.children.shape[1], axis=1)
+
+            candidate_scores = self._score_candidates(skill_vectors, np.where(valid, candidates, self.root))
+            candidate_scores[~valid] = -np.inf
+
+            best, frontier_scores = select_top_k(candidate_scores, beam_width)
+            frontier = np.where(np.isfinite(frontier_scores), np.take_along_axis(candidates, best, axis=1), -1)
+
+        # Levels with fewer candidates than beam_width leave the beam narrower; pad it back
+        padding = beam_width - frontier.shape[1]
+        if padding > 0:
+            frontier = np.pad(frontier, ((0, 0), (0, padding)), constant_values=-1)
+            frontier_scores = np.pad(frontier_scores, ((0, 0), (0, padding)), constant_values=-np.inf)
+        return frontier, frontier_scores
+
+
+def categorize_hierarchical(tree, skill_descriptions, beam_width=DEFAULT_BEAM_WIDTH, batch_size=SCORE_BATCH_SIZE):
+    """Hierarchical counterpart of scoring.categorize_batch for a pandas Series.
+
+    Adds a category_path column; alternatives are the other leaves left in the beam.
+    """
+    texts = skill_descriptions.tolist()
+    leaves = np.empty((len(texts), beam_width), dtype=np.intp)
+    scores = np.empty((len(texts), beam_width), dtype=np.float32)
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        stop = start + len(batch)
+        leaves[start:stop], scores[start:stop] = tree.beam_search(embed_texts(batch, tree.vectors.shape[1]), beam_width)
+
+    # Index -1 (no match) picks up the trailing "Uncategorized" entry
+    names = np.asarray(tree.names + ["Uncategorized"], dtype=object)
+    paths = np.asarray(tree.paths + ["Uncategorized"], dtype=object)
+    matched = scores[:, 0] > 0
+    best = np.where(matched, leaves[:, 0], -1)
+    reasoning = np.where(
+        matched,
+        "Strongest overlap within " + paths[best] + " (score "
+        + np.char.mod("%.2f", scores[:, 0]).astype(object) + ").",
+        "No overlap with any category description."
+    )
+
+    alternatives = names[leaves[:, 1:]].tolist()
+    if (leaves[:, 1:] < 0).any():
+        alternatives = [names[row[row >= 0]].tolist() for row in leaves[:, 1:]]
+
+    return pd.DataFrame({
+        "recommended_category": names[best],
+        "match_score": scores[:, 0],
+        "reasoning": reasoning,
+        "category_path": paths[best],
+        "alternatives": alternatives
+    }, index=skill_descriptions.index)
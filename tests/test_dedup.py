@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+import dedup
+from dedup import categorize_deduplicated, minhash_signatures, near_duplicate_groups
+
+BASE = ("Developed and optimized big data processing pipelines using Apache Spark with batch and streaming "
+        "workloads, data transformation, ETL processes and distributed computing on large clusters")
+
+
+def _jaccard(first, second):
+    first, second = set(dedup._shingles(first)), set(dedup._shingles(second))
+    return len(first & second) / len(first | second)
+
+
+def _distinct_texts(count, words=30, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"term{i}" for i in range(5000)]
+    return [" ".join(rng.choice(vocabulary, words)) for _ in range(count)]
+
+
+def test_signature_agreement_estimates_jaccard():
+    rng = np.random.default_rng(1)
+    errors = []
+    for text in _distinct_texts(50, words=40):
+        words = text.split()
+        for position in rng.choice(len(words), int(rng.integers(1, 12)), replace=False):
+            words[position] = f"edit{rng.integers(10 ** 6)}"
+        edited = " ".join(words)
+        signatures = minhash_signatures([text, edited])
+        errors.append(abs((signatures[0] == signatures[1]).mean() - _jaccard(text, edited)))
+    assert np.mean(errors) < 0.06
+
+
+def test_near_duplicates_group_and_distinct_texts_do_not():
+    near = [BASE, BASE + " today", BASE.replace("large", "huge"), BASE.upper()]
+    distinct = _distinct_texts(200)
+    groups = near_duplicate_groups(near + distinct)
+    assert list(groups[:len(near)]) == [0] * len(near)
+    assert list(groups[len(near):]) == list(range(len(near), len(near) + len(distinct)))
+
+
+def test_signatures_do_not_depend_on_block_boundaries(monkeypatch):
+    texts = _distinct_texts(20, words=50) + ["", None, "short"]
+    expected = minhash_signatures(texts)
+    monkeypatch.setattr(dedup, "MINHASH_BLOCK_SHINGLES", 7)
+    assert np.array_equal(minhash_signatures(texts), expected)
+
+
+def test_categorize_deduplicated_scores_one_row_per_group():
+    descriptions = pd.Series([BASE, "Tableau dashboards for executive KPI reporting", BASE + " today"],
+                             index=[10, 11, 12])
+    seen = []
+
+    def categorize(batch):
+        seen.extend(batch.index)
+        return pd.DataFrame({"recommended_category": [f"c{label}" for label in batch.index]}, index=batch.index)
+
+    results = categorize_deduplicated(descriptions, categorize)
+    assert seen == [10, 11]
+    assert results["recommended_category"].tolist() == ["c10", "c11", "c10"]
+    assert results["duplicate_of"].tolist() == [10, 11, 10]
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from jobs import DONE, FAILED, JobQueue
+
+CHUNKS = 5
+ROWS_PER_CHUNK = 10
+
+
+def _wait(queue, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (DONE, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def _counting_job(seen, stop_at=None, stopped=None, release=None):
+    """Handler whose work commits CHUNKS chunks, optionally stalling before chunk stop_at"""
+    def handler(params):
+        def work(job):
+            seen.append((job.chunks_done, [payload["chunk"] for payload in job.committed_chunks()]))
+            for chunk in range(job.chunks_done, CHUNKS):
+                if chunk == stop_at:
+                    stopped.set()
+                    release.wait()
+                    return None
+                job.commit_chunk(chunk, (chunk + 1) * ROWS_PER_CHUNK, {"chunk": chunk})
+            return f"{job.rows_done} rows"
+        return work
+    return handler
+
+
+def test_interrupted_job_resumes_from_its_checkpoint(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    first_seen, stopped, release = [], threading.Event(), threading.Event()
+    first = JobQueue(path, {"count": _counting_job(first_seen, stop_at=2, stopped=stopped, release=release)})
+    job_id = first.submit("count", "count", {}, total_rows=CHUNKS * ROWS_PER_CHUNK)
+    assert stopped.wait(10)
+
+    # A second queue on the same file stands in for the process after a restart
+    resumed_seen = []
+    second = JobQueue(path, {"count": _counting_job(resumed_seen)})
+    job = _wait(second, job_id)
+    release.set()
+    first._executor.shutdown()
+    second._executor.shutdown()
+
+    assert first_seen == [(0, [])]
+    assert resumed_seen == [(2, [0, 1])]
+    assert job["status"] == DONE
+    assert job["rows_done"] == job["total_rows"] == CHUNKS * ROWS_PER_CHUNK
+    assert job["start_rows"] == 2 * ROWS_PER_CHUNK
+    assert job["detail"] == f"{CHUNKS * ROWS_PER_CHUNK} rows"
+
+
+def test_checkpoints_are_dropped_once_a_job_finishes(tmp_path):
+    seen = []
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), {"count": _counting_job(seen)})
+    job_id = queue.submit("count", "count", {})
+    assert _wait(queue, job_id)["status"] == DONE
+    queue._executor.shutdown()
+    assert queue._committed_chunks(job_id) == []
+
+
+def test_a_chunk_is_committed_once(tmp_path):
+    outcomes = []
+
+    def handler(params):
+        def work(job):
+            outcomes.append(job.commit_chunk(0, 10, {"chunk": 0}))
+            outcomes.append(job.commit_chunk(0, 20, {"chunk": 0}))
+            return None
+        return work
+
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), {"once": handler})
+    job = _wait(queue, queue.submit("once", "once", {}))
+    queue._executor.shutdown()
+    assert outcomes == [True, False]
+    assert job["rows_done"] == 10
+
+
+def test_interrupted_job_without_a_handler_fails(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    stopped, release = threading.Event(), threading.Event()
+    first = JobQueue(path, {"count": _counting_job([], stop_at=1, stopped=stopped, release=release)})
+    job_id = first.submit("count", "count", {})
+    assert stopped.wait(10)
+
+    second = JobQueue(path, {})
+    job = second.get(job_id)
+    release.set()
+    first._executor.shutdown()
+    assert job["status"] == FAILED
+    assert job["error"] == "Interrupted by a restart"
+
+
+def test_job_that_cannot_be_rebuilt_fails_on_its_own(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    stopped, release = threading.Event(), threading.Event()
+    first = JobQueue(path, {"count": _counting_job([], stop_at=1, stopped=stopped, release=release)})
+    job_id = first.submit("count", "count", {})
+    assert stopped.wait(10)
+
+    def broken(params):
+        raise KeyError("files")
+
+    second = JobQueue(path, {"count": broken})
+    job = second.get(job_id)
+    release.set()
+    first._executor.shutdown()
+    assert job["status"] == FAILED
+    assert job["error"].startswith("Could not resume after a restart")
@@ -0,0 +1,77 @@
+import numpy as np
+
+from neighbors import CatalogLoader, IVFIndex, SkillCatalog, load_or_build_catalog
+
+
+def _clustered_vectors(n, dim=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _brute_force(vectors, queries, k):
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = queries @ vectors.T
+    return np.sort(scores, axis=1)[:, ::-1][:, :k]
+
+
+def test_probing_every_list_matches_brute_force():
+    vectors = _clustered_vectors(2000)
+    queries = _clustered_vectors(20, seed=1)
+    index = IVFIndex.build(vectors)
+    ids, scores = index.search(queries, k=5, n_probe=len(index.centroids))
+    np.testing.assert_allclose(scores, _brute_force(vectors, queries, 5), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(np.einsum("qd,qkd->qk", queries / np.linalg.norm(queries, axis=1, keepdims=True),
+                                         vectors[ids]), scores, rtol=1e-5, atol=1e-6)
+
+
+def test_default_probes_recall_most_neighbours():
+    vectors = _clustered_vectors(5000)
+    queries = _clustered_vectors(100, seed=2)
+    index = IVFIndex.build(vectors)
+    _, scores = index.search(queries, k=3)
+    # Counted by score so that ties between equally close rows do not count as misses
+    kth_best = _brute_force(vectors, queries, 3)[:, -1:]
+    assert (scores >= kth_best - 1e-6).mean() >= 0.9
+
+
+def test_short_results_are_padded():
+    index = IVFIndex.build(_clustered_vectors(3))
+    ids, scores = index.search(_clustered_vectors(1, seed=3), k=5, n_probe=len(index.centroids))
+    assert list(ids[0, 3:]) == [-1, -1]
+    assert np.isneginf(scores[0, 3:]).all()
+    empty_ids, _ = IVFIndex.build(np.empty((0, 8), dtype=np.float32)).search(np.ones((1, 8)), k=2)
+    assert (empty_ids == -1).all()
+
+
+def test_candidates_are_reranked_against_the_skill():
+    catalog = SkillCatalog.from_skills(["Apache Spark", "Hadoop", "Tableau", "React", "Kafka streaming"],
+                                       dim=256)
+    category = catalog.index.vectors[catalog.index.positions[[0, 1, 4]]].sum(axis=0)
+    candidates, = catalog.candidates(category[None, :], n_candidates=5)
+    names = set(catalog.names[candidates])
+    assert {"Apache Spark", "Hadoop", "Kafka streaming"} <= names
+    assert "React" not in names
+    skill = catalog.index.vectors[catalog.index.positions[4]]
+    assert catalog.rerank(candidates, skill, k=1) == ["Kafka streaming"]
+
+
+def test_catalog_is_saved_once_and_loaded_after(tmp_path):
+    names, descriptions = ["Python", "SQL", "Docker"], ["scripting", "queries", None]
+    built = load_or_build_catalog(names, str(tmp_path), descriptions, dim=64)
+    saved = list(tmp_path.glob("skill_catalog-*.npz"))
+    assert len(saved) == 1
+    loaded = load_or_build_catalog(names, str(tmp_path), descriptions, dim=64)
+    assert loaded.version == built.version
+    assert list(loaded.names) == names
+    np.testing.assert_array_equal(loaded.index.vectors, built.index.vectors)
+
+
+def test_catalog_loader_builds_in_the_background(tmp_path):
+    loader = CatalogLoader(["Python", "SQL"], str(tmp_path), dim=64)
+    loader._thread.join(10)
+    assert loader.error is None
+    assert list(loader.catalog.names) == ["Python", "SQL"]
+    # Once saved, a new loader has the catalog right away
+    assert CatalogLoader(["Python", "SQL"], str(tmp_path), dim=64).catalog is not None
@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+import pytest
+
+from run_scores import RunScores
+from scoring import CategoryIndex, embed_texts
+
+DIM = 256
+
+SKILLS = [
+    "React front end web applications with Redux",
+    "Tableau dashboards and KPI reporting",
+    "Apache Spark batch and streaming pipelines",
+    "Database schema design and SQL tuning",
+    "SAP Basis administration and HANA backups",
+    "Kubernetes clusters and Docker images",
+]
+
+TAXONOMY = {
+    "Software Development": "web applications front end react javascript",
+    "Data and Analytics": "dashboards reporting tableau kpi analytics",
+    "Big Data": "spark hadoop streaming pipelines distributed",
+}
+
+
+def _index(descriptions):
+    return CategoryIndex.from_descriptions(descriptions, DIM)
+
+
+def _store(path, quantized=False):
+    return RunScores(DIM, str(path), quantized=quantized)
+
+
+def _expected(index, skills=SKILLS):
+    return embed_texts(skills, DIM) @ np.asarray(index.vectors).T
+
+
+def test_new_runs_are_scored_against_the_current_columns(tmp_path):
+    store, index = _store(tmp_path), _index(TAXONOMY)
+    store.sync(index)
+    store.add_runs(SKILLS)
+    assert len(store) == len(SKILLS)
+    np.testing.assert_allclose(store.scores, _expected(index), rtol=1e-5, atol=1e-6)
+
+
+def test_sync_recomputes_only_what_a_taxonomy_edit_can_move(tmp_path):
+    store, index = _store(tmp_path), _index(TAXONOMY)
+    store.sync(index)
+    store.add_runs(SKILLS)
+    before = _expected(index).argmax(axis=1)
+
+    edited = dict(TAXONOMY, **{"Data Modeling": "database schema design sql normalization",
+                               "Big Data": "spark kafka streaming"})
+    edited_index = _index(edited)
+    rows, best = store.sync(edited_index)
+
+    expected = _expected(edited_index)
+    np.testing.assert_allclose(store.scores, expected, rtol=1e-5, atol=1e-6)
+    assert store.categories == list(edited)
+    # Every run whose best category moved is reported, with its new best column
+    moved = np.flatnonzero(expected.argmax(axis=1) != [edited_index.categories.index(index.categories[column])
+                                                        for column in before])
+    assert set(moved) <= set(rows)
+    np.testing.assert_array_equal(best, expected[rows].argmax(axis=1))
+    # The unchanged columns are carried over, not recomputed
+    assert store.sync(edited_index)[0].size == 0
+
+
+def test_a_reopened_store_keeps_its_rows_and_columns(tmp_path):
+    store, index = _store(tmp_path), _index(TAXONOMY)
+    store.sync(index)
+    store.add_runs(SKILLS[:4])
+
+    reopened = _store(tmp_path)
+    assert len(reopened) == 4
+    assert reopened.categories == index.categories
+    reopened.add_runs(SKILLS[4:])
+    np.testing.assert_allclose(reopened.scores, _expected(index), rtol=1e-5, atol=1e-6)
+
+
+def test_rows_past_the_saved_count_are_cut_off(tmp_path):
+    store, index = _store(tmp_path), _index(TAXONOMY)
+    store.sync(index)
+    store.add_runs(SKILLS[:3])
+    # An append interrupted before meta.json was replaced
+    with open(os.path.join(tmp_path, "vectors.bin"), "ab") as f:
+        f.write(b"\0" * (DIM * 4 + 7))
+
+    reopened = _store(tmp_path)
+    assert len(reopened) == 3
+    reopened.add_runs(SKILLS[3:])
+    np.testing.assert_allclose(reopened.scores, _expected(index), rtol=1e-5, atol=1e-6)
+
+
+def test_runs_stored_by_another_replica_are_not_added_twice(tmp_path):
+    index = _index(TAXONOMY)
+    ours, theirs = _store(tmp_path), _store(tmp_path)
+    ours.sync(index)
+    first_row = len(theirs)
+    theirs.add_runs(SKILLS[:2], first_row=first_row)
+    # ours still believes the store is empty
+    ours.add_runs(SKILLS[:4], first_row=first_row)
+    assert len(ours) == 4
+    np.testing.assert_allclose(ours.scores, _expected(index, SKILLS[:4]), rtol=1e-5, atol=1e-6)
+
+
+def test_reset_drops_every_row(tmp_path):
+    store, index = _store(tmp_path), _index(TAXONOMY)
+    store.sync(index)
+    store.add_runs(SKILLS)
+    store.reset()
+    assert len(store) == 0
+    assert len(_store(tmp_path)) == 0
+
+
+@pytest.mark.parametrize("quantized", [False, True])
+def test_vector_format_is_part_of_the_store(tmp_path, quantized):
+    index = _index(TAXONOMY)
+    store = _store(tmp_path, quantized)
+    store.sync(index)
+    store.add_runs(SKILLS)
+    store.sync(_index(dict(TAXONOMY, Extra="kubernetes docker clusters")))
+    np.testing.assert_allclose(store.scores[:, :3], _expected(index), rtol=1e-5, atol=1e-6)
+    # The recomputed column comes from int8 vectors when quantized
+    extra = _expected(_index({"Extra": "kubernetes docker clusters"}))[:, 0]
+    np.testing.assert_allclose(store.scores[:, 3], extra, atol=0.02 if quantized else 1e-6)
+    # A store opened in the other format starts empty
+    assert len(_store(tmp_path, not quantized)) == 0
@@ -0,0 +1,122 @@
+"""Vectorized cleaning and validation of uploaded skill rows"""
+import numpy as np
+import pandas as pd
+
+# Longer text is cut to this many characters and the row flagged
+MAX_DESCRIPTION_LENGTH = 5000
+MAX_NAME_LENGTH = 200
+
+# Characters of each text kept in the rejects report
+REPORT_TEXT_LENGTH = 200
+
+REJECTED = "rejected"
+FLAGGED = "flagged"
+
+# Whitespace and control characters; each run becomes a single space
+_SEPARATORS = r"[\s\x00-\x1f\x7f-\x9f]+"
+_REPLACEMENT_CHARACTER = "\ufffd"
+
+
+def normalize_text(values):
+    """NFKC-normalise, collapse whitespace and control characters, and strip; missing values become ''"""
+    text = values.astype("string[pyarrow]").fillna("")
+    return text.str.normalize("NFKC").str.replace(_SEPARATORS, " ", regex=True).str.strip()
+
+
+def _hashes(*columns):
+    return pd.util.hash_pandas_object(pd.concat([column.str.casefold() for column in columns], axis=1),
+                                      index=False).to_numpy()
+
+
+def _contains(sorted_hashes, hashes):
+    positions = np.searchsorted(sorted_hashes, hashes).clip(max=max(len(sorted_hashes) - 1, 0))
+    return (sorted_hashes[positions] == hashes) if len(sorted_hashes) else np.zeros(len(hashes), dtype=bool)
+
+
+def _repeated(hashes, mask):
+    """True where a masked entry repeats an earlier masked entry"""
+    repeated = np.zeros(len(hashes), dtype=bool)
+    repeated[mask] = pd.Series(hashes[mask]).duplicated().to_numpy()
+    return repeated
+
+
+def _with_reason(reasons, mask, reason):
+    return reasons.mask(mask, reasons + np.where(reasons.eq(""), "", "; ") + reason)
+
+
+class UploadValidator:
+    """Cleans upload chunks and checks them against every row it has accepted so far.
+
+    Rows with an empty description, or the same skill name and description (ignoring
+    case) as an accepted row, are rejected. Rows whose text was cut to the length caps,
+    that contained undecodable bytes, or that repeat an accepted skill name with a
+    different description are kept and flagged. All checks are vectorized pandas and
+    NumPy operations; accepted rows are remembered as sorted 64-bit hashes.
+    """
+
+    def __init__(self):
+        self._row_hashes = np.empty(0, dtype=np.uint64)
+        self._name_hashes = np.empty(0, dtype=np.uint64)
+
+    def remember(self, names, descriptions):
+        """Record already accepted rows, e.g. those replayed from a checkpoint; names may be None"""
+        descriptions = normalize_text(pd.Series(descriptions, dtype=object))
+        names = normalize_text(pd.Series(names, dtype=object)) if names is not None else pd.Series("", index=descriptions.index)
+        self._row_hashes = np.union1d(self._row_hashes, _hashes(names, descriptions))
+        if names.ne("").any():
+            self._name_hashes = np.union1d(self._name_hashes, _hashes(names[names.ne("")]))
+
+    def validate(self, chunk, name_column, description_column, first_row=1):
+        """Return (cleaned accepted rows, report of rejected and flagged rows).
+
+        name_column may be None. Report rows carry their row number (first_row for the
+        chunk's first row), the shortened name and description, the action taken and
+        the reasons.
+        """
+        raw = chunk[description_column].astype("string[pyarrow]").fillna("")
+        raw_names = (chunk[name_column].astype("string[pyarrow]").fillna("") if name_column is not None
+                     else pd.Series("", index=chunk.index, dtype="string[pyarrow]"))
+        bad_encoding = (raw.str.contains(_REPLACEMENT_CHARACTER, regex=False)
+                        | raw_names.str.contains(_REPLACEMENT_CHARACTER, regex=False))
+        descriptions = normalize_text(raw.str.replace(_REPLACEMENT_CHARACTER, "", regex=False))
+        names = normalize_text(raw_names.str.replace(_REPLACEMENT_CHARACTER, "", regex=False))
+
+        reasons = pd.Series("", index=chunk.index, dtype=object)
+        rejected = descriptions.eq("").to_numpy()
+        reasons = _with_reason(reasons, rejected, "empty description")
+        reasons = _with_reason(reasons, bad_encoding, "undecodable characters removed")
+        long_descriptions = descriptions.str.len().gt(MAX_DESCRIPTION_LENGTH)
+        reasons = _with_reason(reasons, long_descriptions, f"description cut to {MAX_DESCRIPTION_LENGTH} characters")
+        descriptions = descriptions.str.slice(0, MAX_DESCRIPTION_LENGTH)
+        long_names = names.str.len().gt(MAX_NAME_LENGTH)
+        reasons = _with_reason(reasons, long_names, f"name cut to {MAX_NAME_LENGTH} characters")
+        names = names.str.slice(0, MAX_NAME_LENGTH)
+
+        row_hashes = _hashes(names, descriptions)
+        duplicate_rows = ~rejected & (_contains(self._row_hashes, row_hashes) | _repeated(row_hashes, ~rejected))
+        reasons = _with_reason(reasons, duplicate_rows, "duplicate of an earlier row")
+        accepted = ~(rejected | duplicate_rows)
+
+        if name_column is not None:
+            name_hashes = _hashes(names)
+            named = accepted & names.ne("").to_numpy()
+            duplicate_names = named & (_contains(self._name_hashes, name_hashes) | _repeated(name_hashes, named))
+            reasons = _with_reason(reasons, duplicate_names, "duplicate skill name")
+            self._name_hashes = np.union1d(self._name_hashes, name_hashes[named])
+        self._row_hashes = np.union1d(self._row_hashes, row_hashes[accepted])
+
+        reported = reasons.ne("").to_numpy()
+        report_descriptions = descriptions[reported].where(descriptions[reported].ne(""), raw[reported])
+        report = pd.DataFrame({
+            "row": first_row + np.flatnonzero(reported),
+            "skill_name": names[reported].str.slice(0, REPORT_TEXT_LENGTH).to_numpy(),
+            "skill_description": report_descriptions.str.slice(0, REPORT_TEXT_LENGTH).to_numpy(),
+            "action": np.where(accepted[reported], FLAGGED, REJECTED),
+            "reason": reasons[reported].to_numpy()
+        })
+
+        cleaned = chunk.loc[accepted].copy()
+        cleaned[description_column] = descriptions[accepted].astype(object)
+        if name_column is not None:
+            cleaned[name_column] = names[accepted].astype(object)
+        return cleaned, report